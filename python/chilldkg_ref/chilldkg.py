@@ -9,15 +9,26 @@ their arguments and return values, and the exceptions they raise; see also the
 """
 
 from secrets import token_bytes as random_bytes
-from typing import Any, Tuple, List, NamedTuple, NewType, Optional, NoReturn, Dict
+from typing import (
+    Any,
+    Tuple,
+    List,
+    NamedTuple,
+    NewType,
+    Optional,
+    NoReturn,
+    Dict,
+    Sequence,
+    Union,
+)
 
-from secp256k1proto.secp256k1 import Scalar, GE
-from secp256k1proto.bip340 import schnorr_sign, schnorr_verify
+from secp256k1proto.secp256k1 import Scalar, GE, G
+from secp256k1proto.bip340 import schnorr_sign_keypair, schnorr_batch_find_invalid
 from secp256k1proto.keys import pubkey_gen_plain
-from secp256k1proto.util import bytes_from_int
+from secp256k1proto.util import bytes_from_int, int_from_bytes
 
 from .vss import VSSCommitment
-from . import encpedpop
+from . import encpedpop, simplpedpop
 from .util import (
     BIP_TAG,
     tagged_hash_bip_dkg,
@@ -31,15 +42,22 @@ from .util import (
 __all__ = [
     # Functions
     "hostpubkey_gen",
+    "hostkey_prepare",
+    "params_prepare",
     "params_id",
     "participant_step1",
     "participant_step2",
     "participant_finalize",
     "participant_investigate",
     "coordinator_step1",
+    "coordinator_step1_begin",
+    "coordinator_step1_add",
+    "coordinator_step1_finish",
     "coordinator_finalize",
     "coordinator_investigate",
+    "coordinator_investigate_participant",
     "recover",
+    "verify_dkg_output",
     # Exceptions
     "HostSeckeyError",
     "SessionParamsError",
@@ -52,7 +70,9 @@ __all__ = [
     "UnknownFaultyParticipantOrCoordinatorError",
     "RecoveryDataError",
     # Types
+    "HostKey",
     "SessionParams",
+    "PreparedSessionParams",
     "DKGOutput",
     "ParticipantMsg1",
     "ParticipantMsg2",
@@ -62,6 +82,7 @@ __all__ = [
     "CoordinatorMsg1",
     "CoordinatorMsg2",
     "CoordinatorState",
+    "CoordinatorAccumulator",
     "RecoveryData",
 ]
 
@@ -71,35 +92,46 @@ __all__ = [
 ###
 
 
-def certeq_message(x: bytes, idx: int) -> bytes:
+def certeq_message(x: bytes, idx: int) -> List[bytes]:
+    # Return the message as a list of chunks (see bip340.Message), so that the
+    # possibly large x is hashed without being copied.
+    #
     # Domain separation as described in BIP 340
     prefix = (BIP_TAG + "certeq message").encode()
     prefix = prefix + b"\x00" * (33 - len(prefix))
-    return prefix + idx.to_bytes(4, "big") + x
+    return [prefix + idx.to_bytes(4, "big"), x]
 
 
-def certeq_participant_step(hostseckey: bytes, idx: int, x: bytes) -> bytes:
+def certeq_participant_step(hostkey: "HostKey", idx: int, x: bytes) -> bytes:
     msg = certeq_message(x, idx)
-    return schnorr_sign(msg, hostseckey, aux_rand=random_bytes(32))
+    # The signature is verified before it is returned (which protects against
+    # fault attacks). Since the public key is cached, this does not need to
+    # decode it.
+    return schnorr_sign_keypair(
+        msg,
+        hostkey.signing_seckey,
+        hostkey.hostpubkey_ge,
+        aux_rand=random_bytes(32),
+    )
 
 
 def certeq_cert_len(n: int) -> int:
     return 64 * n
 
 
-def certeq_verify(hostpubkeys: List[bytes], x: bytes, cert: bytes) -> None:
+def certeq_verify(hostpubkeys: List[GE], x: bytes, cert: bytes) -> None:
     n = len(hostpubkeys)
     if len(cert) != certeq_cert_len(n):
         raise ValueError
-    for i in range(n):
-        msg = certeq_message(x, i)
-        valid = schnorr_verify(
-            msg,
-            hostpubkeys[i][1:33],
-            cert[i * 64 : (i + 1) * 64],
-        )
-        if not valid:
-            raise InvalidSignatureInCertificateError(i)
+    # Verifying all signatures in a batch is much faster than verifying them one
+    # by one, but still identifies the first invalid signature.
+    invalid = schnorr_batch_find_invalid(
+        [certeq_message(x, i) for i in range(n)],
+        hostpubkeys,
+        [cert[i * 64 : (i + 1) * 64] for i in range(n)],
+    )
+    if invalid is not None:
+        raise InvalidSignatureInCertificateError(invalid)
 
 
 def certeq_coordinator_step(sigs: List[bytes]) -> bytes:
@@ -157,6 +189,73 @@ def hostpubkey_gen(hostseckey: bytes) -> bytes:
     return pubkey_gen_plain(hostseckey)
 
 
+class HostKey(NamedTuple):
+    """A `HostKey` tuple holds a host secret key together with data derived
+    from it.
+
+    It is returned by `hostkey_prepare` and can be passed instead of a host
+    secret key to `participant_step1`, `participant_step2` and `recover`. This
+    avoids deriving the host public key again in every session if many sessions
+    are run with the same host secret key. The secret attributes are omitted
+    from the string representation of a `HostKey`, so that it can be logged.
+
+    Attributes:
+        hostseckey: The host secret key (32 bytes).
+        hostpubkey: The host public key (33 bytes), as returned by
+            `hostpubkey_gen`.
+        hostpubkey_ge: The decoded host public key.
+        xonly_hostpubkey: The host public key in x-only encoding (32 bytes), as
+            used for signing.
+        signing_seckey: The host secret key as an integer, negated if necessary
+            such that it matches `xonly_hostpubkey`.
+    """
+
+    hostseckey: bytes
+    hostpubkey: bytes
+    hostpubkey_ge: GE
+    xonly_hostpubkey: bytes
+    signing_seckey: int
+
+    def __repr__(self) -> str:
+        return (
+            f"HostKey(hostseckey=<redacted>, hostpubkey={self.hostpubkey!r}, "
+            f"hostpubkey_ge={self.hostpubkey_ge!r}, "
+            f"xonly_hostpubkey={self.xonly_hostpubkey!r}, signing_seckey=<redacted>)"
+        )
+
+
+def hostkey_prepare(hostseckey: bytes) -> HostKey:
+    """Prepare a host secret key for use in many sessions.
+
+    Arguments:
+        hostseckey: This participant's long-term secret key (32 bytes).
+
+    Returns:
+        HostKey: The prepared host key.
+
+    Raises:
+        HostSeckeyError: If the length of `hostseckey` is not 32 bytes.
+    """
+    hostpubkey = hostpubkey_gen(hostseckey)  # HostSeckeyError if len(hostseckey) != 32
+    seckey = int_from_bytes(hostseckey)
+    # The x-only public key corresponds to the secret key negated if necessary
+    # to obtain an even y coordinate.
+    signing_seckey = seckey if hostpubkey[0] == 2 else Scalar.SIZE - seckey
+    return HostKey(
+        hostseckey,
+        hostpubkey,
+        GE.from_bytes_compressed(hostpubkey),
+        hostpubkey[1:],
+        signing_seckey,
+    )
+
+
+def hostkey_prepared(hostseckey: Union[bytes, HostKey]) -> HostKey:
+    if isinstance(hostseckey, HostKey):
+        return hostseckey
+    return hostkey_prepare(hostseckey)
+
+
 class HostSeckeyError(ValueError):
     """Raised if the length of a host secret key is not 32 bytes."""
 
@@ -208,16 +307,83 @@ class SessionParams(NamedTuple):
     t: int
 
 
-def params_validate(params: SessionParams) -> None:
+class PreparedSessionParams(NamedTuple):
+    """A `PreparedSessionParams` tuple holds validated `SessionParams` together
+    with data derived from them.
+
+    It is returned by `params_prepare` and can be passed to all functions that
+    accept a `SessionParams` tuple. This avoids validating and decoding the host
+    public keys again in every session if many sessions are run with the same
+    parameters.
+
+    Attributes:
+        params: The session parameters.
+        hostpubkeys_ge: The decoded host public keys.
+        hostpubkey_to_idx: Map from every host public key to its index in
+            `params.hostpubkeys`.
+        enc_context: The context for the encryption of secret shares.
+        params_id: The parameters ID (see `params_id`).
+    """
+
+    params: SessionParams
+    hostpubkeys_ge: List[GE]
+    hostpubkey_to_idx: Dict[bytes, int]
+    enc_context: bytes
+    params_id: bytes
+
+
+def params_prepare(params: SessionParams) -> PreparedSessionParams:
+    """Validate `SessionParams` and prepare them for use in many sessions.
+
+    Arguments:
+        params: Common session parameters.
+
+    Returns:
+        PreparedSessionParams: The prepared session parameters.
+
+    Raises:
+        InvalidHostPubkeyError: If `hostpubkeys` contains an invalid public key.
+        DuplicateHostPubkeyError: If `hostpubkeys` contains duplicates.
+        ThresholdOrCountError: If `1 <= t <= len(hostpubkeys) <= 2**32 - 1` does
+            not hold.
+    """
+    hostpubkeys_ge, hostpubkey_to_idx = params_validate(params)
+    hostpubkeys, t = params
+    t_bytes = t.to_bytes(4, byteorder="big")
+    params_id = tagged_hash_bip_dkg(
+        "params_id",
+        t_bytes + b"".join(hostpubkeys),
+    )
+    assert len(params_id) == 32
+    return PreparedSessionParams(
+        params,
+        hostpubkeys_ge,
+        hostpubkey_to_idx,
+        encpedpop.serialize_enc_context(t, hostpubkeys),
+        params_id,
+    )
+
+
+def params_prepared(
+    params: Union[SessionParams, PreparedSessionParams],
+) -> PreparedSessionParams:
+    if isinstance(params, PreparedSessionParams):
+        return params
+    return params_prepare(params)
+
+
+def params_validate(params: SessionParams) -> Tuple[List[GE], Dict[bytes, int]]:
+    # Return the decoded hostpubkeys and the map from hostpubkeys to indices.
     (hostpubkeys, t) = params
 
     if not (1 <= t <= len(hostpubkeys) <= 2**32 - 1):
         raise ThresholdOrCountError
 
     # Check that all hostpubkeys are valid
+    hostpubkeys_ge = []
     for i, hostpubkey in enumerate(hostpubkeys):
         try:
-            _ = GE.from_bytes_compressed(hostpubkey)
+            hostpubkeys_ge.append(GE.from_bytes_compressed(hostpubkey))
         except ValueError as e:
             raise InvalidHostPubkeyError(i) from e
 
@@ -227,9 +393,10 @@ def params_validate(params: SessionParams) -> None:
         if hostpubkey in hostpubkey_to_idx:
             raise DuplicateHostPubkeyError(hostpubkey_to_idx[hostpubkey], i)
         hostpubkey_to_idx[hostpubkey] = i
+    return hostpubkeys_ge, hostpubkey_to_idx
 
 
-def params_id(params: SessionParams) -> bytes:
+def params_id(params: Union[SessionParams, PreparedSessionParams]) -> bytes:
     """Return the parameters ID, a unique representation of the `SessionParams`.
 
     In the common scenario that the participants obtain host public keys from
@@ -253,16 +420,7 @@ def params_id(params: SessionParams) -> bytes:
         ThresholdOrCountError: If `1 <= t <= len(hostpubkeys) <= 2**32 - 1` does
             not hold.
     """
-    params_validate(params)
-    hostpubkeys, t = params
-
-    t_bytes = t.to_bytes(4, byteorder="big")
-    params_id = tagged_hash_bip_dkg(
-        "params_id",
-        t_bytes + b"".join(hostpubkeys),
-    )
-    assert len(params_id) == 32
-    return params_id
+    return params_prepared(params).params_id
 
 
 class SessionParamsError(ValueError):
@@ -413,25 +571,29 @@ def deserialize_recovery_data(
 
 
 class ParticipantState1(NamedTuple):
-    params: SessionParams
+    params: PreparedSessionParams
     idx: int
     enc_state: encpedpop.ParticipantState
 
 
 class ParticipantState2(NamedTuple):
-    params: SessionParams
+    params: PreparedSessionParams
     eq_input: bytes
     dkg_output: DKGOutput
 
 
 def participant_step1(
-    hostseckey: bytes, params: SessionParams, random: bytes
+    hostseckey: Union[bytes, HostKey],
+    params: Union[SessionParams, PreparedSessionParams],
+    random: bytes,
 ) -> Tuple[ParticipantState1, ParticipantMsg1]:
     """Perform a participant's first step of a ChillDKG session.
 
     Arguments:
-        hostseckey: Participant's long-term host secret key (32 bytes).
-        params: Common session parameters.
+        hostseckey: Participant's long-term host secret key (32 bytes),
+            optionally prepared with `hostkey_prepare`.
+        params: Common session parameters (optionally prepared with
+            `params_prepare`).
         random: FRESH random byte string (32 bytes).
 
     Returns:
@@ -449,14 +611,14 @@ def participant_step1(
         ThresholdOrCountError: If `1 <= t <= len(hostpubkeys) <= 2**32 - 1` does
             not hold.
     """
-    hostpubkey = hostpubkey_gen(hostseckey)  # HostSeckeyError if len(hostseckey) != 32
+    hostkey = hostkey_prepared(hostseckey)  # HostSeckeyError if len(hostseckey) != 32
 
-    params_validate(params)
-    (hostpubkeys, t) = params
+    prepared = params_prepared(params)
+    (hostpubkeys, t) = prepared.params
 
     try:
-        idx = hostpubkeys.index(hostpubkey)
-    except ValueError as e:
+        idx = prepared.hostpubkey_to_idx[hostkey.hostpubkey]
+    except KeyError as e:
         raise HostSeckeyError(
             "Host secret key does not match any host public key"
         ) from e
@@ -464,20 +626,21 @@ def participant_step1(
         # We know that EncPedPop uses its seed only by feeding it to a hash
         # function. Thus, it is sufficient that the seed has a high entropy,
         # and so we can simply pass the hostseckey as seed.
-        seed=hostseckey,
-        deckey=hostseckey,
+        seed=hostkey.hostseckey,
+        deckey=hostkey.hostseckey,
         t=t,
         # This requires the joint security of Schnorr signatures and ECDH.
         enckeys=hostpubkeys,
         idx=idx,
         random=random,
-    )  # HostSeckeyError if len(hostseckey) != 32
-    state1 = ParticipantState1(params, idx, enc_state)
+        enckeys_ge=prepared.hostpubkeys_ge,
+    )
+    state1 = ParticipantState1(prepared, idx, enc_state)
     return state1, ParticipantMsg1(enc_pmsg)
 
 
 def participant_step2(
-    hostseckey: bytes,
+    hostseckey: Union[bytes, HostKey],
     state1: ParticipantState1,
     cmsg1: CoordinatorMsg1,
 ) -> Tuple[ParticipantState2, ParticipantMsg2]:
@@ -496,7 +659,8 @@ def participant_step2(
     `recover` function.
 
     Arguments:
-        hostseckey: Participant's long-term host secret key (32 bytes).
+        hostseckey: Participant's long-term host secret key (32 bytes),
+            optionally prepared with `hostkey_prepare`.
         state1: The participant's session state as output by
             `participant_step1`.
         cmsg1: The first message received from the coordinator.
@@ -518,13 +682,16 @@ def participant_step2(
             investigation procedure of the protocol is necessary to determine a
             suspected participant. See the documentation of the exception for
             further details.
+        FaultyCoordinatorError: If the coordinator is faulty. See the
+            documentation of the exception for further details.
     """
+    hostkey = hostkey_prepared(hostseckey)  # HostSeckeyError if len(hostseckey) != 32
     params, idx, enc_state = state1
     enc_cmsg, enc_secshares = cmsg1
 
     enc_dkg_output, eq_input = encpedpop.participant_step2(
         state=enc_state,
-        deckey=hostseckey,
+        deckey=hostkey.hostseckey,
         cmsg=enc_cmsg,
         enc_secshare=enc_secshares[idx],
     )
@@ -534,7 +701,7 @@ def participant_step2(
     eq_input += b"".join([bytes_from_int(int(share)) for share in enc_secshares])
     dkg_output = DKGOutput._make(enc_dkg_output)
     state2 = ParticipantState2(params, eq_input, dkg_output)
-    sig = certeq_participant_step(hostseckey, idx, eq_input)
+    sig = certeq_participant_step(hostkey, idx, eq_input)
     pmsg2 = ParticipantMsg2(sig)
     return state2, pmsg2
 
@@ -580,7 +747,7 @@ def participant_finalize(
     """
     params, eq_input, dkg_output = state2
     try:
-        certeq_verify(params.hostpubkeys, eq_input, cmsg2.cert)
+        certeq_verify(params.hostpubkeys_ge, eq_input, cmsg2.cert)
     except InvalidSignatureInCertificateError as e:
         raise FaultyParticipantOrCoordinatorError(
             e.participant,
@@ -628,19 +795,30 @@ def participant_investigate(
 
 
 class CoordinatorState(NamedTuple):
-    params: SessionParams
+    params: PreparedSessionParams
     eq_input: bytes
-    dkg_output: DKGOutput
+    # The coordinator's DKG output is computed from these only in
+    # coordinator_finalize, so that the first step finishes quickly.
+    sum_coms_tweaked: VSSCommitment
+    pubshares: Optional[List[GE]]
 
 
 def coordinator_step1(
-    pmsgs1: List[ParticipantMsg1], params: SessionParams
+    pmsgs1: List[ParticipantMsg1],
+    params: Union[SessionParams, PreparedSessionParams],
+    pubshares_hint: bool = False,
 ) -> Tuple[CoordinatorState, CoordinatorMsg1]:
     """Perform the coordinator's first step of a ChillDKG session.
 
     Arguments:
         pmsgs1: List of first messages received from the participants.
-        params: Common session parameters.
+        params: Common session parameters (optionally prepared with
+            `params_prepare`).
+        pubshares_hint: Whether to include the public shares computed by the
+            coordinator in `CoordinatorMsg1`. Participants then check all of
+            them at once instead of computing them on their own, which speeds
+            up `participant_step2` for large thresholds. The hint does not
+            affect the outputs of the session.
 
     Returns:
         CoordinatorState: The coordinator's session state after this step, to be
@@ -655,17 +833,129 @@ def coordinator_step1(
         ThresholdOrCountError: If `1 <= t <= len(hostpubkeys) <= 2**32 - 1` does
             not hold.
     """
-    params_validate(params)
-    hostpubkeys, t = params
+    acc = coordinator_step1_begin(params)
+    if len(pmsgs1) != len(acc.params.params.hostpubkeys):
+        raise ValueError
+    for idx, pmsg1 in enumerate(pmsgs1):
+        coordinator_step1_add(acc, idx, pmsg1)
+    return coordinator_step1_finish(acc, pubshares_hint)
 
-    enc_cmsg, enc_dkg_output, eq_input, enc_secshares = encpedpop.coordinator_step(
-        pmsgs=[pmsg1.enc_pmsg for pmsg1 in pmsgs1],
-        t=t,
-        enckeys=hostpubkeys,
+
+class CoordinatorAccumulator(NamedTuple):
+    """A `CoordinatorAccumulator` tuple holds the coordinator's state while
+    receiving the first messages of the participants.
+
+    It is returned by `coordinator_step1_begin`. Its contents are internal and
+    are updated in place by `coordinator_step1_add`. If it has been created with
+    `spill` set, its `close` method must be called when it is no longer needed.
+    """
+
+    params: PreparedSessionParams
+    enc_acc: encpedpop.CoordinatorAccumulator
+
+    def close(self) -> None:
+        """Delete the temporary file of the accumulator, if any.
+
+        The accumulator must not be used afterwards."""
+        self.enc_acc.close()
+
+
+def coordinator_step1_begin(
+    params: Union[SessionParams, PreparedSessionParams],
+    spill: bool = False,
+) -> CoordinatorAccumulator:
+    """Begin the coordinator's first step of a ChillDKG session.
+
+    Together with `coordinator_step1_add` and `coordinator_step1_finish`, this
+    function is an alternative to `coordinator_step1` that processes each
+    first message of a participant as soon as it arrives. Most of the work of
+    the first step is thus done while waiting for the remaining participants,
+    and the messages need not be kept in memory.
+
+    The messages are, however, needed for `coordinator_investigate`. If `spill`
+    is set, the accumulator writes them to a temporary file with fixed-width
+    records (of `32 * n + 33 * t + 97` bytes per participant), from which
+    `coordinator_investigate` reads them back if called with the accumulator.
+    This keeps the memory used by the coordinator in O(n * t) instead of
+    O(n^2) for large `n`. The file is deleted when the `close` method of the
+    accumulator is called.
+
+    Arguments:
+        params: Common session parameters (optionally prepared with
+            `params_prepare`).
+        spill: Whether to write the messages to a temporary file.
+
+    Returns:
+        CoordinatorAccumulator: The accumulator, to be passed to
+            `coordinator_step1_add` for every participant and then to
+            `coordinator_step1_finish`.
+
+    Raises:
+        InvalidHostPubkeyError: If `hostpubkeys` contains an invalid public key.
+        DuplicateHostPubkeyError: If `hostpubkeys` contains duplicates.
+        ThresholdOrCountError: If `1 <= t <= len(hostpubkeys) <= 2**32 - 1` does
+            not hold.
+    """
+    prepared = params_prepared(params)
+    hostpubkeys, t = prepared.params
+    n = len(hostpubkeys)
+    store = encpedpop.ParticipantMsgStore(t, n) if spill else None
+    return CoordinatorAccumulator(
+        prepared, encpedpop.CoordinatorAccumulator(t, hostpubkeys, store)
+    )
+
+
+def coordinator_step1_add(
+    acc: CoordinatorAccumulator, idx: int, pmsg1: ParticipantMsg1
+) -> None:
+    """Add the first message of a participant to a coordinator accumulator.
+
+    Arguments:
+        acc: The accumulator as output by `coordinator_step1_begin`.
+        idx: The index of the participant in `hostpubkeys`.
+        pmsg1: The first message received from the participant.
+
+    Raises:
+        IndexError: If `idx` is not a valid index.
+        ValueError: If a message for `idx` has already been added.
+        FaultyParticipantOrCoordinatorError: If the message is malformed. See
+            the documentation of the exception for further details.
+    """
+    acc.enc_acc.add(idx, pmsg1.enc_pmsg)
+
+
+def coordinator_step1_finish(
+    acc: CoordinatorAccumulator,
+    pubshares_hint: bool = False,
+) -> Tuple[CoordinatorState, CoordinatorMsg1]:
+    """Finish the coordinator's first step of a ChillDKG session.
+
+    The result is the same as that of `coordinator_step1` called with all
+    messages added to the accumulator. Unless `pubshares_hint` is set, this
+    function does only `O(t)` group operations, so `CoordinatorMsg1` can be
+    sent almost immediately after the last message has arrived. (The public
+    shares in the coordinator's DKG output are computed later by
+    `coordinator_finalize`.)
+
+    Arguments:
+        acc: The accumulator as output by `coordinator_step1_begin`, after
+            adding the first messages of all participants.
+        pubshares_hint: See `coordinator_step1`.
+
+    Returns:
+        CoordinatorState: See `coordinator_step1`.
+        CoordinatorMsg1: See `coordinator_step1`.
+
+    Raises:
+        ValueError: If the message of some participant has not been added.
+    """
+    enc_cmsg, sum_coms_tweaked, eq_input, enc_secshares = acc.enc_acc.finalize(
+        pubshares_hint
     )
     eq_input += b"".join([bytes_from_int(int(share)) for share in enc_secshares])
-    dkg_output = DKGOutput._make(enc_dkg_output)  # Convert to chilldkg.DKGOutput type
-    state = CoordinatorState(params, eq_input, dkg_output)
+    state = CoordinatorState(
+        acc.params, eq_input, sum_coms_tweaked, enc_cmsg.simpl_cmsg.pubshares
+    )
     cmsg1 = CoordinatorMsg1(enc_cmsg, enc_secshares)
     return state, cmsg1
 
@@ -708,20 +998,25 @@ def coordinator_finalize(
             is faulty. See the documentation of the exception for further
             details.
     """
-    params, eq_input, dkg_output = state
+    params, eq_input, sum_coms_tweaked, pubshares = state
     cert = certeq_coordinator_step([pmsg2.sig for pmsg2 in pmsgs2])
     try:
-        certeq_verify(params.hostpubkeys, eq_input, cert)
+        certeq_verify(params.hostpubkeys_ge, eq_input, cert)
     except InvalidSignatureInCertificateError as e:
         raise FaultyParticipantError(
             e.participant,
             "Participant has provided an invalid signature for the certificate",
         ) from e
+    dkg_output = DKGOutput._make(  # Convert to chilldkg.DKGOutput type
+        simplpedpop.coordinator_output(
+            sum_coms_tweaked, len(params.hostpubkeys_ge), pubshares
+        )
+    )
     return CoordinatorMsg2(cert), dkg_output, RecoveryData(eq_input + cert)
 
 
 def coordinator_investigate(
-    pmsgs: List[ParticipantMsg1],
+    pmsgs: Union[List[ParticipantMsg1], CoordinatorAccumulator],
 ) -> List[CoordinatorInvestigationMsg]:
     """Generate investigation messages for a ChillDKG session.
 
@@ -730,26 +1025,71 @@ def coordinator_investigate(
 
     Each message is intended for a single participant but can be safely
     broadcast to all participants because the messages contain no confidential
-    information.
+    information. If only some participants ask for an investigation, it is
+    faster to generate only their messages using
+    `coordinator_investigate_participant`.
 
     Arguments:
-        pmsgs: List of first messages received from the participants.
+        pmsgs: List of first messages received from the participants, or a
+            `CoordinatorAccumulator` created with `spill` set, to which the
+            messages of all participants have been added.
 
     Returns:
         List[CoordinatorInvestigationMsg]: A list of investigation messages, each
             intended for a single participant.
+
+    Raises:
+        ValueError: If `pmsgs` is an accumulator created without `spill`.
     """
-    enc_cinvs = encpedpop.coordinator_investigate([pmsg.enc_pmsg for pmsg in pmsgs])
+    enc_cinvs = encpedpop.coordinator_investigate(coordinator_enc_pmsgs(pmsgs))
     return [CoordinatorInvestigationMsg(enc_cinv) for enc_cinv in enc_cinvs]
 
 
+def coordinator_investigate_participant(
+    pmsgs: Union[List[ParticipantMsg1], CoordinatorAccumulator], idx: int
+) -> CoordinatorInvestigationMsg:
+    """Generate the investigation message for a single participant.
+
+    This returns the same message as `coordinator_investigate(pmsgs)[idx]`, but
+    computes only this message, which is much faster if only a few participants
+    ask for an investigation.
+
+    Arguments:
+        pmsgs: See `coordinator_investigate`.
+        idx: The index of the participant asking for an investigation.
+
+    Returns:
+        CoordinatorInvestigationMsg: The investigation message for the
+            participant.
+
+    Raises:
+        IndexError: If `idx` is not a valid index.
+        ValueError: If `pmsgs` is an accumulator created without `spill`.
+    """
+    enc_cinv = encpedpop.coordinator_investigate_participant(
+        coordinator_enc_pmsgs(pmsgs), idx
+    )
+    return CoordinatorInvestigationMsg(enc_cinv)
+
+
+def coordinator_enc_pmsgs(
+    pmsgs: Union[List[ParticipantMsg1], CoordinatorAccumulator],
+) -> Sequence[encpedpop.ParticipantMsg]:
+    if isinstance(pmsgs, CoordinatorAccumulator):
+        store = pmsgs.enc_acc.store
+        if store is None:
+            raise ValueError("Accumulator does not store the messages")
+        return store
+    return [pmsg.enc_pmsg for pmsg in pmsgs]
+
+
 ###
 ### Recovery
 ###
 
 
 def recover(
-    hostseckey: Optional[bytes], recovery_data: RecoveryData
+    hostseckey: Optional[Union[bytes, HostKey]], recovery_data: RecoveryData
 ) -> Tuple[DKGOutput, SessionParams]:
     """Recover the DKG output of a ChillDKG session.
 
@@ -762,8 +1102,9 @@ def recover(
        backup after data loss.
 
     Arguments:
-        hostseckey: This participant's long-term host secret key (32 bytes) or
-            `None` if recovering the coordinator.
+        hostseckey: This participant's long-term host secret key (32 bytes),
+            optionally prepared with `hostkey_prepare`, or `None` if recovering
+            the coordinator.
         recovery_data: Recovery data from a successful session.
 
     Returns:
@@ -784,40 +1125,38 @@ def recover(
         raise RecoveryDataError("Failed to deserialize recovery data") from e
 
     n = len(hostpubkeys)
-    params = SessionParams(hostpubkeys, t)
     try:
-        params_validate(params)
+        prepared = params_prepare(SessionParams(hostpubkeys, t))
     except SessionParamsError as e:
         raise RecoveryDataError("Invalid session parameters in recovery data") from e
 
     # Verify cert
     eq_input = recovery_data[: -len(cert)]
     try:
-        certeq_verify(hostpubkeys, eq_input, cert)
+        certeq_verify(prepared.hostpubkeys_ge, eq_input, cert)
     except InvalidSignatureInCertificateError as e:
         raise RecoveryDataError("Invalid certificate in recovery data") from e
 
     # Compute threshold pubkey and individual pubshares
     sum_coms, tweak, _ = sum_coms.invalid_taproot_commit()
     threshold_pubkey = sum_coms.commitment_to_secret()
-    pubshares = [sum_coms.pubshare(i) for i in range(n)]
+    pubshares = sum_coms.pubshares(n)
 
     if hostseckey:
-        hostpubkey = hostpubkey_gen(hostseckey)  # HostSeckeyError
+        hostkey = hostkey_prepared(hostseckey)  # HostSeckeyError
         try:
-            idx = hostpubkeys.index(hostpubkey)
-        except ValueError as e:
+            idx = prepared.hostpubkey_to_idx[hostkey.hostpubkey]
+        except KeyError as e:
             raise HostSeckeyError(
                 "Host secret key does not match any host public key in the recovery data"
             ) from e
 
         # Decrypt share
-        enc_context = encpedpop.serialize_enc_context(t, hostpubkeys)
         secshare = encpedpop.decrypt_sum(
-            hostseckey,
+            hostkey.hostseckey,
             hostpubkeys[idx],
             pubnonces,
-            enc_context,
+            prepared.enc_context,
             idx,
             enc_secshares[idx],
         )
@@ -834,8 +1173,51 @@ def recover(
         threshold_pubkey.to_bytes_compressed(),
         [pubshare.to_bytes_compressed() for pubshare in pubshares],
     )
-    return dkg_output, params
+    return dkg_output, prepared.params
 
 
 class RecoveryDataError(ValueError):
     """Raised if the recovery data is invalid."""
+
+
+###
+### Verification of DKG outputs
+###
+
+
+def verify_dkg_output(dkg_output: DKGOutput, t: int) -> bool:
+    """Check the consistency of a DKG output.
+
+    This is useful for checking DKG outputs that have been restored from
+    storage or obtained from `recover`. The check is probabilistic, i.e., an
+    inconsistent output is accepted only with negligible probability. It costs
+    one fixed-base scalar multiplication and one multi-scalar multiplication
+    with `n + 1` terms, where `n = len(dkg_output.pubshares)`.
+
+    Arguments:
+        dkg_output: The DKG output to check.
+        t: The participation threshold `t` of the DKG session.
+
+    Returns:
+        bool: Whether all of the following hold: All keys in `dkg_output` are
+            valid encodings. The secret share (unless it is `None`) matches one
+            of the public shares. Every subset of `t` public shares can be
+            interpolated to the threshold public key.
+    """
+    secshare, threshold_pubkey, pubshares = dkg_output
+    n = len(pubshares)
+    if not 1 <= t <= n:
+        return False
+    try:
+        if len(threshold_pubkey) != 33 or any(len(P) != 33 for P in pubshares):
+            return False
+        threshold_pubkey_ge = GE.from_bytes_compressed(threshold_pubkey)
+        pubshares_ge = [GE.from_bytes_compressed(P) for P in pubshares]
+        if secshare is not None:
+            if len(secshare) != 32:
+                return False
+            if Scalar.from_bytes(secshare) * G not in pubshares_ge:
+                return False
+    except ValueError:
+        return False
+    return VSSCommitment.verify_pubshares(threshold_pubkey_ge, pubshares_ge, t)
@@ -1,11 +1,14 @@
-from typing import Tuple, List, NamedTuple, NoReturn
+import mmap
+import tempfile
+from typing import BinaryIO, Tuple, List, NamedTuple, NoReturn, Optional, Sequence
 
 from secp256k1proto.secp256k1 import Scalar, GE
-from secp256k1proto.ecdh import ecdh_libsecp256k1
+from secp256k1proto.ecdh import ecdh_libsecp256k1, ecdh_libsecp256k1_multi
 from secp256k1proto.keys import pubkey_gen_plain
 from secp256k1proto.util import int_from_bytes
 
 from . import simplpedpop
+from .vss import VSSCommitment
 from .util import (
     UnknownFaultyParticipantOrCoordinatorError,
     tagged_hash_bip_dkg,
@@ -19,10 +22,14 @@ from .util import (
 ###
 
 
-def ecdh(
-    seckey: bytes, my_pubkey: bytes, their_pubkey: bytes, context: bytes, sending: bool
+def ecdh_pad(
+    shared_secret: bytes,
+    my_pubkey: bytes,
+    their_pubkey: bytes,
+    context: bytes,
+    sending: bool,
 ) -> Scalar:
-    data = ecdh_libsecp256k1(seckey, their_pubkey)
+    data = shared_secret
     if sending:
         data += my_pubkey + their_pubkey
     else:
@@ -32,6 +39,38 @@ def ecdh(
     return Scalar(int_from_bytes(tagged_hash_bip_dkg("encpedpop ecdh", data)))
 
 
+def ecdh(
+    seckey: bytes, my_pubkey: bytes, their_pubkey: bytes, context: bytes, sending: bool
+) -> Scalar:
+    shared_secret = ecdh_libsecp256k1(seckey, their_pubkey)
+    return ecdh_pad(shared_secret, my_pubkey, their_pubkey, context, sending)
+
+
+def ecdh_multi(
+    seckey: bytes,
+    my_pubkey: bytes,
+    their_pubkeys: List[bytes],
+    contexts: List[bytes],
+    sending: bool,
+    their_pubkeys_ge: Optional[List[GE]] = None,
+) -> List[Scalar]:
+    # Equivalent to calling ecdh() for every pair of their_pubkey and context,
+    # but with a faster multiplication of the same seckey with many points.
+    #
+    # If given, their_pubkeys_ge must be the decoded their_pubkeys, which saves
+    # decoding them again.
+    assert len(their_pubkeys) == len(contexts)
+    shared_secrets = ecdh_libsecp256k1_multi(
+        seckey, their_pubkeys if their_pubkeys_ge is None else their_pubkeys_ge
+    )
+    return [
+        ecdh_pad(shared_secret, my_pubkey, their_pubkey, context, sending)
+        for shared_secret, their_pubkey, context in zip(
+            shared_secrets, their_pubkeys, contexts
+        )
+    ]
+
+
 def self_pad(symkey: bytes, nonce: bytes, context: bytes) -> Scalar:
     # Pad for symmetric encryption to ourselves
     return Scalar(
@@ -48,6 +87,7 @@ def encaps_multi(
     enckeys: List[bytes],
     context: bytes,
     idx: int,
+    enckeys_ge: Optional[List[GE]] = None,
 ) -> List[Scalar]:
     # This is effectively the "Hashed ElGamal" multi-recipient KEM described in
     # Section 5 of "Multi-recipient encryption, revisited" by Alexandre Pinto,
@@ -55,21 +95,30 @@ def encaps_multi(
     # feature is to feed the index of the enckey to the hash function. The only
     # difference is that we feed also the pubnonce and context data into the
     # hash function.
+    n = len(enckeys)
+    contexts = [i.to_bytes(4, byteorder="big") + context for i in range(n)]
+    # Multiplying our secnonce with all other enckeys at once is faster than
+    # calling ecdh() for every enckey.
+    ecdh_pads = iter(
+        ecdh_multi(
+            seckey=secnonce,
+            my_pubkey=pubnonce,
+            their_pubkeys=[enckeys[i] for i in range(n) if i != idx],
+            contexts=[contexts[i] for i in range(n) if i != idx],
+            sending=True,
+            their_pubkeys_ge=None
+            if enckeys_ge is None
+            else [enckeys_ge[i] for i in range(n) if i != idx],
+        )
+    )
     pads = []
-    for i, enckey in enumerate(enckeys):
-        context_ = i.to_bytes(4, byteorder="big") + context
+    for i in range(n):
         if i == idx:
             # We're encrypting to ourselves, so we use a symmetrically derived
             # pad to save the ECDH computation.
-            pad = self_pad(symkey=deckey, nonce=pubnonce, context=context_)
+            pad = self_pad(symkey=deckey, nonce=pubnonce, context=contexts[i])
         else:
-            pad = ecdh(
-                seckey=secnonce,
-                my_pubkey=pubnonce,
-                their_pubkey=enckey,
-                context=context_,
-                sending=True,
-            )
+            pad = next(ecdh_pads)
         pads.append(pad)
     return pads
 
@@ -82,8 +131,9 @@ def encrypt_multi(
     context: bytes,
     idx: int,
     plaintexts: List[Scalar],
+    enckeys_ge: Optional[List[GE]] = None,
 ) -> List[Scalar]:
-    pads = encaps_multi(secnonce, pubnonce, deckey, enckeys, context, idx)
+    pads = encaps_multi(secnonce, pubnonce, deckey, enckeys, context, idx, enckeys_ge)
     assert len(plaintexts) == len(pads)
     ciphertexts = [plaintext + pad for plaintext, pad in zip(plaintexts, pads)]
     return ciphertexts
@@ -97,18 +147,24 @@ def decaps_multi(
     idx: int,
 ) -> List[Scalar]:
     context_ = idx.to_bytes(4, byteorder="big") + context
+    # Multiplying our deckey with all other pubnonces at once is faster than
+    # calling ecdh() for every pubnonce.
+    other_pubnonces = [pubnonces[i] for i in range(len(pubnonces)) if i != idx]
+    ecdh_pads = iter(
+        ecdh_multi(
+            seckey=deckey,
+            my_pubkey=enckey,
+            their_pubkeys=other_pubnonces,
+            contexts=[context_] * len(other_pubnonces),
+            sending=False,
+        )
+    )
     pads = []
     for sender_idx, pubnonce in enumerate(pubnonces):
         if sender_idx == idx:
             pad = self_pad(symkey=deckey, nonce=pubnonce, context=context_)
         else:
-            pad = ecdh(
-                seckey=deckey,
-                my_pubkey=enckey,
-                their_pubkey=pubnonce,
-                context=context_,
-                sending=False,
-            )
+            pad = next(ecdh_pads)
         pads.append(pad)
     return pads
 
@@ -178,6 +234,7 @@ def participant_step1(
     t: int,
     idx: int,
     random: bytes,
+    enckeys_ge: Optional[List[GE]] = None,
 ) -> Tuple[ParticipantState, ParticipantMsg]:
     assert t < 2 ** (4 * 8)
     assert len(random) == 32
@@ -202,7 +259,7 @@ def participant_step1(
     assert len(shares) == n
 
     enc_shares = encrypt_multi(
-        secnonce, pubnonce, deckey, enckeys, enc_context, idx, shares
+        secnonce, pubnonce, deckey, enckeys, enc_context, idx, shares, enckeys_ge
     )
 
     pmsg = ParticipantMsg(simpl_pmsg, pubnonce, enc_shares)
@@ -245,6 +302,7 @@ def participant_step2(
 def participant_investigate(
     error: UnknownFaultyParticipantOrCoordinatorError,
     cinv: CoordinatorInvestigationMsg,
+    batch: bool = False,
 ) -> NoReturn:
     simpl_inv_data, enc_secshare, pads = error.inv_data
     enc_partial_secshares, partial_pubshares = cinv
@@ -260,6 +318,7 @@ def participant_investigate(
             UnknownFaultyParticipantOrCoordinatorError(simpl_inv_data),
             simpl_cinv,
             partial_secshares,
+            batch,
         )
     except simplpedpop.SecshareSumError as e:
         # The secshare is not equal to the sum of the partial secshares in the
@@ -278,54 +337,205 @@ def participant_investigate(
 ###
 
 
+class ParticipantMsgStore(Sequence[ParticipantMsg]):
+    """Stores participant messages in a file with fixed-width records.
+
+    The record of participant idx is at offset idx * record_len and consists of
+    the commitment (33 * t bytes, infinity encoded as zeros), the pop (64
+    bytes), the pubnonce (33 bytes) and the encrypted shares (32 * n bytes).
+    Records are written when added and read back via a memory mapping, so the
+    messages need not be kept in memory. The store can be used as a sequence of
+    messages, e.g., as argument to coordinator_investigate."""
+
+    def __init__(self, t: int, n: int, file: Optional[BinaryIO] = None) -> None:
+        self.t = t
+        self.n = n
+        self.record_len = 33 * t + 64 + 33 + 32 * n
+        # The store owns the file, which is closed (and deleted, if temporary) by
+        # close().
+        self.file = tempfile.TemporaryFile() if file is None else file  # noqa: SIM115
+        self.file.truncate(n * self.record_len)
+        self._mmap: Optional[mmap.mmap] = None
+
+    def is_storable(self, pmsg: ParticipantMsg) -> bool:
+        # Return whether pmsg fits into a record.
+        return (
+            pmsg.simpl_pmsg.com.t() == self.t
+            and len(pmsg.simpl_pmsg.pop) == 64
+            and len(pmsg.pubnonce) == 33
+            and len(pmsg.enc_shares) == self.n
+        )
+
+    def put(self, idx: int, pmsg: ParticipantMsg) -> None:
+        assert self.is_storable(pmsg)
+        record = b"".join(
+            [
+                pmsg.simpl_pmsg.com.to_bytes(),
+                pmsg.simpl_pmsg.pop,
+                pmsg.pubnonce,
+                b"".join([share.to_bytes() for share in pmsg.enc_shares]),
+            ]
+        )
+        assert len(record) == self.record_len
+        self.file.seek(idx * self.record_len)
+        self.file.write(record)
+        # Make the record visible to the memory mapping, which may already exist.
+        self.file.flush()
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, idx: int) -> ParticipantMsg:  # type: ignore[override]
+        pos = 33 * self.t
+        record = self._record(idx, 0, self.record_len)
+        enc_shares = [
+            Scalar.from_bytes(record[i : i + 32])
+            for i in range(pos + 97, self.record_len, 32)
+        ]
+        return ParticipantMsg(
+            self.simpl_pmsg(idx), record[pos + 64 : pos + 97], enc_shares
+        )
+
+    def simpl_pmsg(self, idx: int) -> simplpedpop.ParticipantMsg:
+        # Read only the commitment and the pop of participant idx.
+        pos = 33 * self.t
+        record = self._record(idx, 0, pos + 64)
+        com = VSSCommitment(
+            [
+                GE.from_bytes_compressed_with_infinity(record[i : i + 33])
+                for i in range(0, pos, 33)
+            ]
+        )
+        return simplpedpop.ParticipantMsg(com, simplpedpop.Pop(record[pos:]))
+
+    def enc_share(self, idx: int, share_idx: int) -> Scalar:
+        # Read only the encrypted share of participant idx for participant
+        # share_idx.
+        if not 0 <= share_idx < self.n:
+            raise IndexError
+        start = 33 * self.t + 97 + 32 * share_idx
+        share: Scalar = Scalar.from_bytes(self._record(idx, start, start + 32))
+        return share
+
+    def _record(self, idx: int, start: int, end: int) -> bytes:
+        # Return bytes start..end of the record of participant idx.
+        if not 0 <= idx < self.n:
+            raise IndexError
+        if self._mmap is None:
+            self._mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        offset = idx * self.record_len
+        return self._mmap[offset + start : offset + end]
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self.file.close()
+
+
+class CoordinatorAccumulator:
+    """Aggregates the participant messages as they arrive.
+
+    This extends simplpedpop.CoordinatorAccumulator by the running sums of the
+    encrypted secret shares. If a store is given, the messages are also written
+    to the store, e.g., to be able to run coordinator_investigate later without
+    keeping the messages in memory."""
+
+    def __init__(
+        self,
+        t: int,
+        enckeys: List[bytes],
+        store: Optional[ParticipantMsgStore] = None,
+    ) -> None:
+        self.enckeys = enckeys
+        n = len(enckeys)
+        self.simpl_acc = simplpedpop.CoordinatorAccumulator(t, n)
+        self.pubnonces: List[Optional[bytes]] = [None] * n
+        self.enc_secshares = [Scalar(0) for _ in range(n)]
+        self.store = store
+
+    def close(self) -> None:
+        # Release the store, if any.
+        if self.store is not None:
+            self.store.close()
+
+    def add(self, idx: int, pmsg: ParticipantMsg) -> None:
+        n = len(self.enckeys)
+        if not 0 <= idx < n:
+            raise IndexError
+        if len(pmsg.enc_shares) != n:
+            raise FaultyParticipantOrCoordinatorError(
+                idx, "Participant sent enc_shares with invalid length"
+            )
+        if self.store is not None and not self.store.is_storable(pmsg):
+            raise FaultyParticipantOrCoordinatorError(
+                idx, "Participant sent message with invalid length"
+            )
+        self.simpl_acc.add(idx, pmsg.simpl_pmsg)
+        if self.store is not None:
+            self.store.put(idx, pmsg)
+        self.pubnonces[idx] = pmsg.pubnonce
+        for i in range(n):
+            self.enc_secshares[i] += pmsg.enc_shares[i]
+
+    def finalize(
+        self, pubshares_hint: bool = False
+    ) -> Tuple[CoordinatorMsg, VSSCommitment, bytes, List[Scalar]]:
+        # See simplpedpop.CoordinatorAccumulator.finalize.
+        simpl_cmsg, sum_coms_tweaked, eq_input = self.simpl_acc.finalize(pubshares_hint)
+        pubnonces = [pubnonce for pubnonce in self.pubnonces if pubnonce is not None]
+        eq_input += b"".join(self.enckeys) + b"".join(pubnonces)
+
+        # In ChillDKG, the coordinator needs to broadcast the entire
+        # enc_secshares array to all participants. But in pure EncPedPop, the
+        # coordinator needs to send to each participant i only their entry
+        # enc_secshares[i].
+        #
+        # Since broadcasting the entire array is not necessary, we don't include
+        # it in encpedpop.CoordinatorMsg, but only return it as a side output, so
+        # that chilldkg.coordinator_step can pick it up. Implementations of pure
+        # EncPedPop will need to decide how to transmit enc_secshares[i] to
+        # participant i for participant_step2(); we leave this unspecified.
+        return (
+            CoordinatorMsg(simpl_cmsg, pubnonces),
+            sum_coms_tweaked,
+            eq_input,
+            list(self.enc_secshares),
+        )
+
+
 def coordinator_step(
     pmsgs: List[ParticipantMsg],
     t: int,
     enckeys: List[bytes],
+    pubshares_hint: bool = False,
 ) -> Tuple[CoordinatorMsg, simplpedpop.DKGOutput, bytes, List[Scalar]]:
     n = len(enckeys)
     if n != len(pmsgs):
         raise ValueError
 
-    simpl_pmsgs = [pmsg.simpl_pmsg for pmsg in pmsgs]
-    simpl_cmsg, dkg_output, eq_input = simplpedpop.coordinator_step(simpl_pmsgs, t, n)
-    pubnonces = [pmsg.pubnonce for pmsg in pmsgs]
-    for i in range(n):
-        if len(pmsgs[i].enc_shares) != n:
-            raise FaultyParticipantOrCoordinatorError(
-                i, "Participant sent enc_shares with invalid length"
-            )
-    enc_secshares = [
-        Scalar.sum(*([pmsg.enc_shares[i] for pmsg in pmsgs])) for i in range(n)
-    ]
-    eq_input += b"".join(enckeys) + b"".join(pubnonces)
-
-    # In ChillDKG, the coordinator needs to broadcast the entire enc_secshares
-    # array to all participants. But in pure EncPedPop, the coordinator needs to
-    # send to each participant i only their entry enc_secshares[i].
-    #
-    # Since broadcasting the entire array is not necessary, we don't include it
-    # in encpedpop.CoordinatorMsg, but only return it as a side output, so that
-    # chilldkg.coordinator_step can pick it up. Implementations of pure
-    # EncPedPop will need to decide how to transmit enc_secshares[i] to
-    # participant i for participant_step2(); we leave this unspecified.
-    return (
-        CoordinatorMsg(simpl_cmsg, pubnonces),
-        dkg_output,
-        eq_input,
-        enc_secshares,
+    acc = CoordinatorAccumulator(t, enckeys)
+    for i, pmsg in enumerate(pmsgs):
+        acc.add(i, pmsg)
+    cmsg, sum_coms_tweaked, eq_input, enc_secshares = acc.finalize(pubshares_hint)
+    dkg_output = simplpedpop.coordinator_output(
+        sum_coms_tweaked, n, cmsg.simpl_cmsg.pubshares
     )
+    return cmsg, dkg_output, eq_input, enc_secshares
 
 
 def coordinator_investigate(
-    pmsgs: List[ParticipantMsg],
+    pmsgs: Sequence[ParticipantMsg],
 ) -> List[CoordinatorInvestigationMsg]:
     n = len(pmsgs)
-    simpl_pmsgs = [pmsg.simpl_pmsg for pmsg in pmsgs]
+    # Read every message only once, so that pmsgs can be a ParticipantMsgStore.
+    simpl_pmsgs = []
+    all_enc_partial_secshares: List[List[Scalar]] = [[] for _ in range(n)]
+    for pmsg in pmsgs:
+        simpl_pmsgs.append(pmsg.simpl_pmsg)
+        for i in range(n):
+            all_enc_partial_secshares[i].append(pmsg.enc_shares[i])
 
-    all_enc_partial_secshares = [
-        [pmsg.enc_shares[i] for pmsg in pmsgs] for i in range(n)
-    ]
     simpl_cinvs = simplpedpop.coordinator_investigate(simpl_pmsgs)
     cinvs = [
         CoordinatorInvestigationMsg(
@@ -334,3 +544,25 @@ def coordinator_investigate(
         for i in range(n)
     ]
     return cinvs
+
+
+def coordinator_investigate_participant(
+    pmsgs: Sequence[ParticipantMsg], idx: int
+) -> CoordinatorInvestigationMsg:
+    # Return coordinator_investigate(pmsgs)[idx], but compute only the message
+    # for participant idx.
+    simpl_pmsgs = []
+    enc_partial_secshares = []
+    if isinstance(pmsgs, ParticipantMsgStore):
+        # Avoid decoding the encrypted shares for the other participants.
+        for i in range(len(pmsgs)):
+            simpl_pmsgs.append(pmsgs.simpl_pmsg(i))
+            enc_partial_secshares.append(pmsgs.enc_share(i, idx))
+    else:
+        for pmsg in pmsgs:
+            simpl_pmsgs.append(pmsg.simpl_pmsg)
+            enc_partial_secshares.append(pmsg.enc_shares[idx])
+    simpl_cinv = simplpedpop.coordinator_investigate_participant(simpl_pmsgs, idx)
+    return CoordinatorInvestigationMsg(
+        enc_partial_secshares, simpl_cinv.partial_pubshares
+    )
@@ -1,8 +1,12 @@
 from secrets import token_bytes as random_bytes
 from typing import List, NamedTuple, NewType, Tuple, Optional, NoReturn
 
-from secp256k1proto.bip340 import schnorr_sign, schnorr_verify
-from secp256k1proto.secp256k1 import GE, Scalar
+from secp256k1proto.bip340 import (
+    schnorr_batch_find_invalid,
+    schnorr_sign,
+    schnorr_verify_ge,
+)
+from secp256k1proto.secp256k1 import GE, GEJ, Scalar
 from .util import (
     BIP_TAG,
     FaultyParticipantOrCoordinatorError,
@@ -42,8 +46,17 @@ def pop_prove(seckey: bytes, idx: int) -> Pop:
     return Pop(sig)
 
 
-def pop_verify(pop: Pop, pubkey: bytes, idx: int) -> bool:
-    return schnorr_verify(pop_msg(idx), pubkey, pop, tag_prefix=POP_MSG_TAG)
+def pop_verify(pop: Pop, pubkey: GE, idx: int) -> bool:
+    return schnorr_verify_ge(pop_msg(idx), pubkey, pop, tag_prefix=POP_MSG_TAG)
+
+
+def pop_batch_find_invalid(
+    pops: List[Pop], pubkeys: List[GE], idxs: List[int]
+) -> Optional[int]:
+    # Return the smallest position j such that pop_verify(pops[j], pubkeys[j],
+    # idxs[j]) returns False, or None if all pops are valid.
+    msgs = [pop_msg(idx) for idx in idxs]
+    return schnorr_batch_find_invalid(msgs, pubkeys, pops, tag_prefix=POP_MSG_TAG)
 
 
 ###
@@ -60,13 +73,18 @@ class CoordinatorMsg(NamedTuple):
     coms_to_secrets: List[GE]
     sum_coms_to_nonconst_terms: List[GE]
     pops: List[Pop]
+    # Optional hint: The (tweaked) pubshares of all participants as computed by
+    # the coordinator. If present, participants check them in a batch instead
+    # of computing them on their own, which is much faster for large n and t.
+    # The hint is not part of the protocol transcript, i.e., it is not included
+    # in to_bytes() or in eq_input.
+    pubshares: Optional[List[GE]] = None
 
     def to_bytes(self) -> bytes:
+        ges = self.coms_to_secrets + self.sum_coms_to_nonconst_terms
+        GE.batch_normalize(ges)
         return b"".join(
-            [
-                P.to_bytes_compressed_with_infinity()
-                for P in self.coms_to_secrets + self.sum_coms_to_nonconst_terms
-            ]
+            [P.to_bytes_compressed_with_infinity() for P in ges]
         ) + b"".join(self.pops)
 
 
@@ -174,7 +192,7 @@ def participant_step2(
     secshare: Scalar,
 ) -> Tuple[DKGOutput, bytes]:
     t, n, idx, com_to_secret = state
-    coms_to_secrets, sum_coms_to_nonconst_terms, pops = cmsg
+    coms_to_secrets, sum_coms_to_nonconst_terms, pops, pubshares_hint = cmsg
 
     assert len(coms_to_secrets) == n
     assert len(sum_coms_to_nonconst_terms) == t - 1
@@ -185,21 +203,30 @@ def participant_step2(
             "Coordinator sent unexpected first group element for local index"
         )
 
-    for i in range(n):
-        if i == idx:
-            # No need to check our own pop.
-            continue
-        if coms_to_secrets[i].infinity:
-            raise FaultyParticipantOrCoordinatorError(
-                i, "Participant sent invalid commitment"
-            )
-        # This can be optimized: We serialize the coms_to_secrets[i] here, but
-        # schnorr_verify (inside pop_verify) will need to deserialize it again, which
-        # involves computing a square root to obtain the y coordinate.
-        if not pop_verify(pops[i], coms_to_secrets[i].to_bytes_xonly(), i):
-            raise FaultyParticipantOrCoordinatorError(
-                i, "Participant sent invalid proof-of-knowledge"
-            )
+    # Check the commitments and the pops of all other participants. (No need to
+    # check our own pop.) The pops are checked in a batch, which is much faster
+    # than checking them one by one. We want to blame the same participant as
+    # checking them one by one in order would, so we check only the pops before
+    # the first invalid commitment.
+    others = [i for i in range(n) if i != idx]
+    first_infinity = next((i for i in others if coms_to_secrets[i].infinity), n)
+    to_check = [i for i in others if i < first_infinity]
+    # The pops are verified against the group elements directly, which avoids
+    # serializing them and deserializing them again (which would involve
+    # computing a square root to obtain the y coordinate).
+    invalid = pop_batch_find_invalid(
+        [pops[i] for i in to_check],
+        [coms_to_secrets[i] for i in to_check],
+        to_check,
+    )
+    if invalid is not None:
+        raise FaultyParticipantOrCoordinatorError(
+            to_check[invalid], "Participant sent invalid proof-of-knowledge"
+        )
+    if first_infinity < n:
+        raise FaultyParticipantOrCoordinatorError(
+            first_infinity, "Participant sent invalid commitment"
+        )
 
     sum_coms = assemble_sum_coms(coms_to_secrets, sum_coms_to_nonconst_terms)
     # Verifying the tweaked secshare against the tweaked pubshare is equivalent
@@ -218,12 +245,17 @@ def participant_step2(
         )
 
     threshold_pubkey = sum_coms_tweaked.commitment_to_secret()
-    pubshares = [
-        sum_coms_tweaked.pubshare(i)
-        if i != idx
-        else pubshare_tweaked  # We have computed our own pubshare already.
-        for i in range(n)
-    ]
+    if pubshares_hint is None:
+        pubshares = sum_coms_tweaked.pubshares(n)
+    else:
+        # Checking the pubshares computed by the coordinator is much cheaper
+        # than computing them.
+        if len(pubshares_hint) != n or not sum_coms_tweaked.batch_check_pubshares(
+            pubshares_hint
+        ):
+            raise FaultyCoordinatorError("Coordinator sent invalid pubshares hint")
+        pubshares = pubshares_hint
+        GE.batch_normalize(pubshares)
     dkg_output = DKGOutput(
         secshare_tweaked.to_bytes(),
         threshold_pubkey.to_bytes_compressed(),
@@ -237,6 +269,7 @@ def participant_investigate(
     error: UnknownFaultyParticipantOrCoordinatorError,
     cinv: CoordinatorInvestigationMsg,
     partial_secshares: List[Scalar],
+    batch: bool = False,
 ) -> NoReturn:
     n, idx, secshare, pubshare = error.inv_data
     partial_pubshares = cinv.partial_pubshares
@@ -247,19 +280,42 @@ def participant_investigate(
     if Scalar.sum(*partial_secshares) != secshare:
         raise SecshareSumError("Sum of partial secshares not equal to secshare")
 
-    for i in range(n):
-        if not VSSCommitment.verify_secshare(
-            partial_secshares[i], partial_pubshares[i]
-        ):
-            if i != idx:
-                raise FaultyParticipantOrCoordinatorError(
-                    i, "Participant sent invalid partial secshare"
-                )
-            else:
-                # We are not faulty, so the coordinator must be.
-                raise FaultyCoordinatorError(
-                    "Coordinator fiddled with the share from me to myself"
+    # Find the first partial secshare that does not match its partial pubshare.
+    #
+    # If batch is set, all pairs are checked in a batch, bisecting on failure.
+    # This blames the same party as checking them one by one and needs only a
+    # logarithmic number of batch checks. However, since fixed-base scalar
+    # multiplications are cheap with the precomputed table for G, the batch
+    # check is not faster than checking the pairs one by one in this
+    # implementation, so it is disabled by default.
+    m = min(n, len(partial_secshares), len(partial_pubshares))
+    if batch:
+        i = VSSCommitment.find_invalid_secshare(
+            partial_secshares[:m], partial_pubshares[:m]
+        )
+    else:
+        i = next(
+            (
+                j
+                for j in range(m)
+                if not VSSCommitment.verify_secshare(
+                    partial_secshares[j], partial_pubshares[j]
                 )
+            ),
+            None,
+        )
+    if i is not None:
+        if i != idx:
+            raise FaultyParticipantOrCoordinatorError(
+                i, "Participant sent invalid partial secshare"
+            )
+        else:
+            # We are not faulty, so the coordinator must be.
+            raise FaultyCoordinatorError(
+                "Coordinator fiddled with the share from me to myself"
+            )
+    if m < n:
+        raise IndexError
 
     # We now know:
     #  - The sum of the partial secshares is equal to the secshare.
@@ -279,35 +335,99 @@ def participant_investigate(
 ###
 
 
+class CoordinatorAccumulator:
+    """Aggregates the participant messages as they arrive.
+
+    The coordinator can fold in each participant message as soon as it has been
+    received (in any order), so that only a small amount of work is left once
+    the last message has arrived. Only the running sums of the commitments are
+    kept, not the messages themselves."""
+
+    def __init__(self, t: int, n: int) -> None:
+        self.t = t
+        self.n = n
+        self.coms_to_secrets: List[Optional[GE]] = [None] * n
+        self.pops: List[Optional[Pop]] = [None] * n
+        # Running sums of the commitments to the i-th coefficients for i > 0
+        self.sums_coms_to_nonconst_terms = [GEJ() for _ in range(t - 1)]
+        self.received = 0
+
+    def add(self, idx: int, pmsg: ParticipantMsg) -> None:
+        if not 0 <= idx < self.n:
+            raise IndexError
+        if self.coms_to_secrets[idx] is not None:
+            raise ValueError("Message from this participant has already been added")
+        coms_to_nonconst_terms = pmsg.com.commitment_to_nonconst_terms()
+        # Check the length before modifying the sums, so that a malformed
+        # message leaves the accumulator unchanged.
+        if len(coms_to_nonconst_terms) < self.t - 1:
+            raise IndexError
+        for j in range(self.t - 1):
+            self.sums_coms_to_nonconst_terms[j] += GEJ.from_ge(
+                coms_to_nonconst_terms[j]
+            )
+        self.coms_to_secrets[idx] = pmsg.com.commitment_to_secret()
+        self.pops[idx] = pmsg.pop
+        self.received += 1
+
+    def finalize(
+        self, pubshares_hint: bool = False
+    ) -> Tuple[CoordinatorMsg, VSSCommitment, bytes]:
+        # Return the coordinator message, the tweaked sum of the commitments
+        # and the equality check input. Only O(t) group operations are needed
+        # unless pubshares_hint is set. The O(n * t) work for the pubshares in
+        # the coordinator's DKG output is left to coordinator_output, so that
+        # the caller can send the coordinator message first.
+        if self.received != self.n:
+            raise ValueError("Messages from some participants are missing")
+        coms_to_secrets = [com for com in self.coms_to_secrets if com is not None]
+        pops = [pop for pop in self.pops if pop is not None]
+        sum_coms_to_nonconst_terms = [
+            r.to_ge() for r in self.sums_coms_to_nonconst_terms
+        ]
+
+        sum_coms = assemble_sum_coms(coms_to_secrets, sum_coms_to_nonconst_terms)
+        sum_coms_tweaked, _, _ = sum_coms.invalid_taproot_commit()
+        cmsg = CoordinatorMsg(
+            coms_to_secrets,
+            sum_coms_to_nonconst_terms,
+            pops,
+            sum_coms_tweaked.pubshares(self.n) if pubshares_hint else None,
+        )
+        eq_input = self.t.to_bytes(4, byteorder="big") + sum_coms.to_bytes()
+        return cmsg, sum_coms_tweaked, eq_input
+
+
+def coordinator_output(
+    sum_coms_tweaked: VSSCommitment, n: int, pubshares: Optional[List[GE]] = None
+) -> DKGOutput:
+    # Return the coordinator's DKG output. The pubshares are computed unless
+    # they are given (e.g., because they have been sent as a hint).
+    if pubshares is None:
+        pubshares = sum_coms_tweaked.pubshares(n)
+    return DKGOutput(
+        None,
+        sum_coms_tweaked.commitment_to_secret().to_bytes_compressed(),
+        [pubshare.to_bytes_compressed() for pubshare in pubshares],
+    )
+
+
 def coordinator_step(
-    pmsgs: List[ParticipantMsg], t: int, n: int
+    pmsgs: List[ParticipantMsg], t: int, n: int, pubshares_hint: bool = False
 ) -> Tuple[CoordinatorMsg, DKGOutput, bytes]:
     # Sum the commitments to the i-th coefficients for i > 0
     #
     # This procedure corresponds to the one described by Pedersen in Section 5.1
     # of "Non-Interactive and Information-Theoretic Secure Verifiable Secret
     # Sharing". However, we don't sum the commitments to the secrets (i == 0)
-    # because they'll be necessary to check the pops.
-    coms_to_secrets = [pmsg.com.commitment_to_secret() for pmsg in pmsgs]
-    # But we can sum the commitments to the non-constant terms.
-    sum_coms_to_nonconst_terms = [
-        GE.sum(*(pmsg.com.commitment_to_nonconst_terms()[j] for pmsg in pmsgs))
-        for j in range(t - 1)
-    ]
-    pops = [pmsg.pop for pmsg in pmsgs]
-    cmsg = CoordinatorMsg(coms_to_secrets, sum_coms_to_nonconst_terms, pops)
-
-    sum_coms = assemble_sum_coms(coms_to_secrets, sum_coms_to_nonconst_terms)
-    sum_coms_tweaked, _, _ = sum_coms.invalid_taproot_commit()
-    threshold_pubkey = sum_coms_tweaked.commitment_to_secret()
-    pubshares = [sum_coms_tweaked.pubshare(i) for i in range(n)]
-
-    dkg_output = DKGOutput(
-        None,
-        threshold_pubkey.to_bytes_compressed(),
-        [pubshare.to_bytes_compressed() for pubshare in pubshares],
-    )
-    eq_input = t.to_bytes(4, byteorder="big") + sum_coms.to_bytes()
+    # because they'll be necessary to check the pops. But we can sum the
+    # commitments to the non-constant terms, which CoordinatorAccumulator does
+    # incrementally.
+    acc = CoordinatorAccumulator(t, n)
+    for i, pmsg in enumerate(pmsgs):
+        acc.add(i, pmsg)
+    cmsg, sum_coms_tweaked, eq_input = acc.finalize(pubshares_hint)
+    dkg_output = coordinator_output(sum_coms_tweaked, n, cmsg.pubshares)
     return cmsg, dkg_output, eq_input
 
 
@@ -315,5 +435,22 @@ def coordinator_investigate(
     pmsgs: List[ParticipantMsg],
 ) -> List[CoordinatorInvestigationMsg]:
     n = len(pmsgs)
-    all_partial_pubshares = [[pmsg.com.pubshare(i) for pmsg in pmsgs] for i in range(n)]
-    return [CoordinatorInvestigationMsg(all_partial_pubshares[i]) for i in range(n)]
+    # Evaluating all pubshares of a commitment at once is much faster than
+    # evaluating them one by one.
+    all_partial_pubshares = [pmsg.com.pubshares(n) for pmsg in pmsgs]
+    return [
+        CoordinatorInvestigationMsg(
+            [pubshares[i] for pubshares in all_partial_pubshares]
+        )
+        for i in range(n)
+    ]
+
+
+def coordinator_investigate_participant(
+    pmsgs: List[ParticipantMsg], idx: int
+) -> CoordinatorInvestigationMsg:
+    # Return coordinator_investigate(pmsgs)[idx], but compute only the partial
+    # pubshares for participant idx.
+    if not 0 <= idx < len(pmsgs):
+        raise IndexError
+    return CoordinatorInvestigationMsg([pmsg.com.pubshare(idx) for pmsg in pmsgs])
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from typing import List, Tuple
+from functools import lru_cache
+from secrets import token_bytes as random_bytes
+from typing import List, NamedTuple, Optional, Tuple
 
-from secp256k1proto.secp256k1 import GE, G, Scalar
+from secp256k1proto.secp256k1 import GE, GEJ, G, Scalar
 from secp256k1proto.util import tagged_hash
 
 from .util import tagged_hash_bip_dkg
@@ -21,32 +23,270 @@ class Polynomial:
 
     def eval(self, x: Scalar) -> Scalar:
         # Evaluate a polynomial at position x.
+        return self.eval_many([int(x)])[0]
 
-        value = Scalar(0)
-        # Reverse coefficients to compute evaluation via Horner's method
-        for coeff in self.coeffs[::-1]:
-            value = value * x + coeff
-        return value
+    def eval_many(self, xs: List[int]) -> List[Scalar]:
+        # Evaluate a polynomial at positions xs.
+        #
+        # We compute with plain integers instead of Scalar objects, which would
+        # be allocated for every operation, and convert to Scalar only at the
+        # end. The coefficients are converted to integers only once for all
+        # positions.
+        #
+        # For many positions and a polynomial of high degree, we use fast
+        # multipoint evaluation instead of evaluating at every position
+        # separately. Both methods give identical results.
+        coeffs_reversed = [int(Scalar(coeff)) for coeff in self.coeffs[::-1]]
+        if (
+            len(xs) >= MULTIPOINT_EVAL_THRESHOLD
+            and len(coeffs_reversed) >= len(xs) // 2
+        ):
+            tree = _subproduct_tree(tuple(x % GE.ORDER for x in xs))
+            values = _multipoint_eval(coeffs_reversed[::-1], tree)
+        else:
+            values = [_horner(coeffs_reversed, x) for x in xs]
+        return [Scalar(value) for value in values]
 
     def __call__(self, x: Scalar) -> Scalar:
         return self.eval(x)
 
 
+def _horner(coeffs_reversed: List[int], x: int) -> int:
+    # Evaluate a polynomial with integer coefficients coeffs_reversed (highest
+    # degree first) at position x modulo the group order, via Horner's method.
+    #
+    # The reduction modulo the group order is lazy: If x is small (e.g., a
+    # participant index), the value stays small for a few steps.
+    order = GE.ORDER
+    value = 0
+    for coeff in coeffs_reversed:
+        value = value * x + coeff
+        if value >= _LAZY_REDUCTION_BOUND:
+            value %= order
+    return value % order
+
+
+# Bound for the lazy modular reduction in _horner.
+_LAZY_REDUCTION_BOUND = 2**512
+
+
+# Fast multipoint evaluation
+#
+# Evaluating a polynomial f of degree t-1 at n positions x_1, ..., x_n with
+# Horner's method takes O(n*t) operations. Multipoint evaluation with a
+# subproduct tree takes quasi-linear time instead: The leaves of the tree are
+# the polynomials (X - x_i), every inner node is the product of its children,
+# and f(x_i) = f mod (X - x_i) is obtained by reducing f modulo the nodes on the
+# path from the root to the leaf (von zur Gathen and Gerhard, "Modern Computer
+# Algebra", Section 10.1).
+#
+# Python's integer multiplication is only subquadratic (Karatsuba), so the
+# crossover point is rather high. For n = 24000 and t = 16000, building the tree
+# and evaluating takes about as long as Horner's method; once the tree has been
+# built (it is cached), evaluation alone is faster from about n = 4000 on.
+MULTIPOINT_EVAL_THRESHOLD = 2**15
+
+# Leaves of the subproduct tree handle this many positions, via Horner's
+# method on the (short) remainder.
+_MULTIPOINT_EVAL_LEAF_SIZE = 128
+
+
+class _SubproductTree(NamedTuple):
+    # The node for positions xs has poly = prod_{x in xs} (X - x) and inv =
+    # 1/rev(poly) mod X^(len(xs)+1), where rev(poly) is poly with reversed
+    # coefficients. Polynomials are lists of integers modulo the group order,
+    # lowest degree first.
+    xs: Tuple[int, ...]
+    poly: List[int]
+    inv: List[int]
+    children: Optional[Tuple[_SubproductTree, _SubproductTree]]
+
+
+def _poly_mul(a: List[int], b: List[int]) -> List[int]:
+    # Multiply two polynomials modulo the group order.
+    #
+    # This uses Kronecker substitution, i.e., the polynomials are packed into
+    # integers (with every coefficient in a slot wide enough to hold any
+    # coefficient of the product), which are then multiplied with Python's
+    # fast integer multiplication.
+    if not a or not b:
+        return []
+    order = GE.ORDER
+    slot = (2 * order.bit_length() + min(len(a), len(b)).bit_length() + 7) // 8
+    a_packed = int.from_bytes(b"".join(c.to_bytes(slot, "little") for c in a), "little")
+    b_packed = int.from_bytes(b"".join(c.to_bytes(slot, "little") for c in b), "little")
+    length = len(a) + len(b) - 1
+    product = (a_packed * b_packed).to_bytes(slot * length, "little")
+    return [
+        int.from_bytes(product[i * slot : (i + 1) * slot], "little") % order
+        for i in range(length)
+    ]
+
+
+def _poly_inv(a: List[int], k: int) -> List[int]:
+    # Return the inverse of a as power series modulo X^k, where a[0] == 1, via
+    # Newton iteration.
+    assert a[0] == 1
+    order = GE.ORDER
+    inv = [1]
+    precision = 1
+    while precision < k:
+        precision = min(2 * precision, k)
+        # inv = inv * (2 - a * inv) mod X^precision
+        e = [-c % order for c in _poly_mul(a[:precision], inv)[:precision]]
+        e[0] = (e[0] + 2) % order
+        inv = _poly_mul(inv, e)[:precision]
+    return inv
+
+
+def _product_tree(xs: Tuple[int, ...]) -> _SubproductTree:
+    # Build the subproduct tree for positions xs, without inverses.
+    order = GE.ORDER
+    if len(xs) <= _MULTIPOINT_EVAL_LEAF_SIZE:
+        poly = [1]
+        for x in xs:
+            # Multiply with (X - x).
+            poly = [
+                ((poly[i - 1] if i > 0 else 0) - (poly[i] * x if i < len(poly) else 0))
+                % order
+                for i in range(len(poly) + 1)
+            ]
+        return _SubproductTree(xs, poly, [], None)
+    half = len(xs) // 2
+    left = _product_tree(xs[:half])
+    right = _product_tree(xs[half:])
+    return _SubproductTree(xs, _poly_mul(left.poly, right.poly), [], (left, right))
+
+
+def _with_inverses(node: _SubproductTree, inv: List[int]) -> _SubproductTree:
+    # Fill in the inverses, given the inverse for node.
+    #
+    # Since rev(poly) = rev(left.poly) * rev(right.poly), the inverse for a
+    # child is the inverse for its parent times rev(poly of the sibling), which
+    # is cheaper than a Newton iteration for every node.
+    if node.children is None:
+        return node._replace(inv=inv)
+    left, right = node.children
+    children = []
+    for child, sibling in ((left, right), (right, left)):
+        k = len(child.xs) + 1
+        child_inv = _poly_mul(inv[:k], sibling.poly[::-1][:k])[:k]
+        children.append(_with_inverses(child, child_inv))
+    return node._replace(inv=inv, children=(children[0], children[1]))
+
+
+@lru_cache(maxsize=1)
+def _subproduct_tree(xs: Tuple[int, ...]) -> _SubproductTree:
+    tree = _product_tree(xs)
+    return _with_inverses(tree, _poly_inv(tree.poly[::-1], len(xs) + 1))
+
+
+def _poly_rem(f: List[int], node: _SubproductTree) -> List[int]:
+    # Return f mod node.poly, via division with a precomputed inverse.
+    m = len(node.xs)
+    k = len(f) - m
+    if k <= 0:
+        return f
+    # The degree of the quotient is less than k, so the inverse of rev(poly)
+    # modulo X^k determines the quotient.
+    if k > len(node.inv):
+        inv = _poly_inv(node.poly[::-1], k)
+    else:
+        inv = node.inv[:k]
+    quotient_rev = _poly_mul(f[::-1][:k], inv)[:k]
+    product = _poly_mul(quotient_rev[::-1], node.poly)
+    return [(f[i] - product[i]) % GE.ORDER for i in range(m)]
+
+
+def _multipoint_eval(coeffs: List[int], tree: _SubproductTree) -> List[int]:
+    # Evaluate the polynomial with coefficients coeffs (lowest degree first) at
+    # the positions of tree.
+    rem = _poly_rem(coeffs, tree)
+    if tree.children is None:
+        return [_horner(rem[::-1], x) for x in tree.xs]
+    left, right = tree.children
+    return _multipoint_eval(rem, left) + _multipoint_eval(rem, right)
+
+
 class VSSCommitment:
     ges: List[GE]
 
     def __init__(self, ges: List[GE]) -> None:
         self.ges = ges
 
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, VSSCommitment) and self.ges == other.ges
+
     def t(self) -> int:
         return len(self.ges)
 
     def pubshare(self, i: int) -> GE:
-        pubshare: GE = GE.batch_mul(
-            *(((i + 1) ** j, self.ges[j]) for j in range(0, len(self.ges)))
-        )
+        # Return the pubshare of the participant with index i.
+        #
+        # This computes f(i+1)*G, where f is the committed polynomial.
+        pubshare: GE = _horner_in_exponent(self._normalized_ges(), i + 1).to_ge()
         return pubshare
 
+    def pubshares(self, n: int) -> List[GE]:
+        # Return the pubshares of the participants with indices 0..n-1.
+        #
+        # This computes [f(1)*G, ..., f(n)*G] and is much faster than calling
+        # pubshare(i) for every i. The returned group elements are normalized,
+        # so they can be serialized cheaply.
+        #
+        # We evaluate the first t points with Horner's method and the remaining
+        # ones with the method of finite differences: Since f has degree at most
+        # t-1, its t-th forward difference is zero, so once we have the forward
+        # differences diffs[k] = (Delta^k f)(x)*G for k = 0..t-1, we can step
+        # from x to x+1 using just t-1 group additions.
+        t = self.t()
+        ges = self._normalized_ges()
+        diffs = [_horner_in_exponent(ges, x) for x in range(1, min(n, t) + 1)]
+        pubshares = list(diffs)
+        if n > t:
+            # Turn [f(1)*G, ..., f(t)*G] into the forward differences at x = 1.
+            for k in range(1, t):
+                for j in range(t - 1, k - 1, -1):
+                    diffs[j] = diffs[j] + (-diffs[j - 1])
+            # Step to x = t, then compute f(t+1)*G, ..., f(n)*G.
+            for x in range(2, n + 1):
+                for k in range(t - 1):
+                    diffs[k] = diffs[k] + diffs[k + 1]
+                if x > t:
+                    pubshares.append(diffs[0])
+        return [p.to_ge() for p in GEJ.batch_normalize(pubshares)]
+
+    def batch_check_pubshares(self, pubshares: List[GE]) -> bool:
+        # Return whether pubshares == self.pubshares(len(pubshares)), except
+        # with negligible probability.
+        #
+        # This checks a random linear combination of the claimed pubshares,
+        # i.e., sum_i r_i*pubshares[i] == sum_i r_i*f(i+1)*G for random 128-bit
+        # r_i. The right-hand side is computed as sum_j c_j*ges[j] with
+        # c_j = sum_i r_i*(i+1)^j, so the whole check is a single multi-scalar
+        # multiplication with len(pubshares) + t terms.
+        t = self.t()
+        coeffs = [0] * t
+        terms: List[Tuple[int, GE]] = []
+        for i, pubshare in enumerate(pubshares):
+            r = int.from_bytes(random_bytes(16), "big")
+            terms.append((r, pubshare))
+            power = r
+            for j in range(t):
+                coeffs[j] += power
+                power = power * (i + 1) % GE.ORDER
+        terms += [(-coeffs[j], self.ges[j]) for j in range(t)]
+        valid: bool = GE.batch_mul(*terms).infinity
+        return valid
+
+    def _normalized_ges(self) -> List[GEJ]:
+        # Return the group elements of this commitment as GEJs with z == 1,
+        # which makes additions of them cheaper.
+        normalized: List[GEJ] = GEJ.batch_normalize(
+            [GEJ.from_ge(ge) for ge in self.ges]
+        )
+        return normalized
+
     @staticmethod
     def verify_secshare(secshare: Scalar, pubshare: GE) -> bool:
         # The caller needs to provide the correct pubshare(i)
@@ -54,8 +294,97 @@ class VSSCommitment:
         valid: bool = actual == pubshare
         return valid
 
+    @staticmethod
+    def batch_verify_secshares(secshares: List[Scalar], pubshares: List[GE]) -> bool:
+        # Return whether verify_secshare(secshares[i], pubshares[i]) holds for
+        # all i, except with negligible probability.
+        #
+        # This checks a random linear combination, i.e., (sum_i r_i*secshares[i])*G
+        # == sum_i r_i*pubshares[i] with r_0 = 1 and random 128-bit r_i for i > 0,
+        # which is a single multi-scalar multiplication.
+        assert len(secshares) == len(pubshares)
+        secshare_sum = 0
+        terms: List[Tuple[int, GE]] = []
+        for i, (secshare, pubshare) in enumerate(zip(secshares, pubshares)):
+            r = 1 if i == 0 else int.from_bytes(random_bytes(16), "big")
+            secshare_sum += r * int(secshare)
+            terms.append((-r, pubshare))
+        valid: bool = GE.batch_mul((secshare_sum, G), *terms).infinity
+        return valid
+
+    @staticmethod
+    def find_invalid_secshare(
+        secshares: List[Scalar], pubshares: List[GE]
+    ) -> Optional[int]:
+        # Return the smallest i such that verify_secshare(secshares[i],
+        # pubshares[i]) does not hold, or None if there is no such i.
+        #
+        # All pairs are checked in a batch first. If the batch check fails, we
+        # bisect: If the first half of the remaining range contains an invalid
+        # pair, we continue with it, and otherwise with the second half.
+        if VSSCommitment.batch_verify_secshares(secshares, pubshares):
+            return None
+        lo, hi = 0, len(secshares)
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if VSSCommitment.batch_verify_secshares(
+                secshares[lo:mid], pubshares[lo:mid]
+            ):
+                lo = mid
+            else:
+                hi = mid
+        assert not VSSCommitment.verify_secshare(secshares[lo], pubshares[lo])
+        return lo
+
+    @staticmethod
+    def verify_secshares(pairs: List[Tuple[Scalar, GE]]) -> bool:
+        # Return whether verify_secshare(secshare, pubshare) holds for all pairs
+        # (secshare, pubshare), except with negligible probability. This needs
+        # one fixed-base scalar multiplication and one multi-scalar
+        # multiplication.
+        return VSSCommitment.batch_verify_secshares(
+            [secshare for secshare, _ in pairs], [pubshare for _, pubshare in pairs]
+        )
+
+    @staticmethod
+    def verify_pubshares(threshold_pubkey: GE, pubshares: List[GE], t: int) -> bool:
+        # Return whether there is a polynomial f of degree at most t - 1 such
+        # that threshold_pubkey == f(0)*G and pubshares[i] == f(i+1)*G for all
+        # i, except with negligible probability. In other words, every subset
+        # of t pubshares interpolates to threshold_pubkey.
+        #
+        # The n + 1 points Y_x (Y_0 = threshold_pubkey, Y_x = pubshares[x-1])
+        # lie on such a polynomial if and only if sum_x v_x*m(x)*Y_x == 0 for
+        # every polynomial m of degree at most n - t, where v_x = 1 /
+        # prod_{y != x} (x - y) (the dual code of a Reed-Solomon code). We
+        # check this for a random m with 128-bit coefficients, which is a single
+        # multi-scalar multiplication with n + 1 terms.
+        n = len(pubshares)
+        assert 1 <= t <= n
+        ys = [threshold_pubkey] + pubshares
+        # For x in 0..n, prod_{y != x} (x - y) == (-1)^(n-x) * x! * (n-x)!.
+        fact = [1] * (n + 1)
+        for x in range(1, n + 1):
+            fact[x] = fact[x - 1] * x % GE.ORDER
+        inv_fact = [1] * (n + 1)
+        inv_fact[n] = pow(fact[n], -1, GE.ORDER)
+        for x in range(n, 0, -1):
+            inv_fact[x - 1] = inv_fact[x] * x % GE.ORDER
+        m = Polynomial(
+            [Scalar(int.from_bytes(random_bytes(16), "big")) for _ in range(n - t + 1)]
+        )
+        terms = []
+        for x, m_x in enumerate(m.eval_many(list(range(n + 1)))):
+            v_x = inv_fact[x] * inv_fact[n - x]
+            if (n - x) % 2 == 1:
+                v_x = -v_x
+            terms.append((v_x * int(m_x) % GE.ORDER, ys[x]))
+        valid: bool = GE.batch_mul(*terms).infinity
+        return valid
+
     def to_bytes(self) -> bytes:
         # Return commitments to the coefficients of f.
+        GE.batch_normalize(self.ges)
         return b"".join([ge.to_bytes_compressed_with_infinity() for ge in self.ges])
 
     def __add__(self, other: VSSCommitment) -> VSSCommitment:
@@ -103,6 +432,30 @@ class VSSCommitment:
         return (self + vss_tweak, secshare_tweak, pubshare_tweak)
 
 
+def _mul_small(p: GEJ, k: int) -> GEJ:
+    # Multiply a group element with a small non-negative integer k using
+    # double-and-add, which is much cheaper than a general scalar multiplication
+    # if k is as small as a participant index.
+    r = GEJ()
+    for bit in bin(k)[2:]:
+        r = r.double()
+        if bit == "1":
+            r = r + p
+    return r
+
+
+def _horner_in_exponent(ges: List[GEJ], x: int) -> GEJ:
+    # Return f(x)*G, where ges are the commitments to the coefficients of f.
+    #
+    # This uses Horner's method in the exponent, i.e., it computes
+    # (...(ges[t-1]*x + ges[t-2])*x + ...)*x + ges[0], which needs only
+    # multiplications with the small integer x.
+    r = GEJ()
+    for ge in reversed(ges):
+        r = _mul_small(r, x) + ge
+    return r
+
+
 class VSS:
     f: Polynomial
 
@@ -134,7 +487,7 @@ class VSS:
         # Return the secret shares for the participants with indices 0..n-1.
         #
         # This computes [f(1), ..., f(n)].
-        return [self.secshare_for(i) for i in range(0, n)]
+        return self.f.eval_many(list(range(1, n + 1)))
 
     def commit(self) -> VSSCommitment:
         return VSSCommitment([c * G for c in self.f.coeffs])
@@ -1,8 +1,35 @@
 # The following functions are based on the BIP 340 reference implementation:
 # https://github.com/bitcoin/bips/blob/master/bip-0340/reference.py
 
+from secrets import randbelow
+from typing import List, Optional, Sequence, Tuple, Union
+
 from .secp256k1 import FE, GE, G
-from .util import int_from_bytes, bytes_from_int, xor_bytes, tagged_hash
+from .util import (
+    int_from_bytes,
+    bytes_from_int,
+    xor_bytes,
+    tagged_hash,
+    tagged_hash_init,
+)
+
+# A message is either a bytes-like object (bytes, bytearray or memoryview) or
+# a sequence of chunks (bytes or memoryview objects). A chunked message is
+# hashed as if the chunks were concatenated, but without materializing the
+# concatenation, which avoids copying large messages.
+Message = Union[bytes, bytearray, memoryview, Sequence[Union[bytes, memoryview]]]
+
+
+def _tagged_hash_with_msg(tag: str, prefix: bytes, msg: Message) -> bytes:
+    # Compute tagged_hash(tag, prefix + msg).
+    h = tagged_hash_init(tag)
+    h.update(prefix)
+    if isinstance(msg, (bytes, bytearray, memoryview)):
+        h.update(msg)
+    else:
+        for chunk in msg:
+            h.update(chunk)
+    return h.digest()
 
 
 def pubkey_gen(seckey: bytes) -> bytes:
@@ -15,19 +42,54 @@ def pubkey_gen(seckey: bytes) -> bytes:
 
 
 def schnorr_sign(
-    msg: bytes, seckey: bytes, aux_rand: bytes, tag_prefix: str = "BIP0340"
+    msg: Message, seckey: bytes, aux_rand: bytes, tag_prefix: str = "BIP0340"
 ) -> bytes:
+    d, P = schnorr_keypair(seckey)
+    return schnorr_sign_keypair(msg, d, P, aux_rand, tag_prefix=tag_prefix)
+
+
+def schnorr_keypair(seckey: bytes) -> Tuple[int, GE]:
+    """Return (d, P) for a secret key, where P = d*G is the public key with even
+    y and d is the secret key negated if necessary.
+
+    The result can be passed to schnorr_sign_keypair to sign many messages with
+    the same key without recomputing the public key."""
     d0 = int_from_bytes(seckey)
     if not (1 <= d0 <= GE.ORDER - 1):
         raise ValueError("The secret key must be an integer in the range 1..n-1.")
-    if len(aux_rand) != 32:
-        raise ValueError("aux_rand must be 32 bytes instead of %i." % len(aux_rand))
     P = d0 * G
     assert not P.infinity
-    d = d0 if P.has_even_y() else GE.ORDER - d0
+    if P.has_even_y():
+        return d0, P
+    return GE.ORDER - d0, -P
+
+
+def schnorr_sign_keypair(
+    msg: Message, d: int, pubkey: GE, aux_rand: bytes, tag_prefix: str = "BIP0340"
+) -> bytes:
+    """Sign with a key pair as returned by schnorr_keypair.
+
+    Like schnorr_sign, this verifies the resulting signature before returning it,
+    which protects against fault attacks and also rejects inconsistent key
+    pairs. Since the public key is given as a group element, the verification
+    does not need to decode it."""
+    sig = _schnorr_sign_unverified(
+        msg, d, pubkey.to_bytes_xonly(), aux_rand, tag_prefix
+    )
+    assert schnorr_verify_ge(msg, pubkey, sig, tag_prefix=tag_prefix)
+    return sig
+
+
+def _schnorr_sign_unverified(
+    msg: Message, d: int, pubkey: bytes, aux_rand: bytes, tag_prefix: str
+) -> bytes:
+    # Sign with secret key d, such that d*G has even y and xonly encoding pubkey.
+    # The signature must be verified before it is returned to the caller.
+    if len(aux_rand) != 32:
+        raise ValueError("aux_rand must be 32 bytes instead of %i." % len(aux_rand))
     t = xor_bytes(bytes_from_int(d), tagged_hash(tag_prefix + "/aux", aux_rand))
     k0 = (
-        int_from_bytes(tagged_hash(tag_prefix + "/nonce", t + P.to_bytes_xonly() + msg))
+        int_from_bytes(_tagged_hash_with_msg(tag_prefix + "/nonce", t + pubkey, msg))
         % GE.ORDER
     )
     if k0 == 0:
@@ -35,21 +97,18 @@ def schnorr_sign(
     R = k0 * G
     assert not R.infinity
     k = k0 if R.has_even_y() else GE.ORDER - k0
+    R_bytes = R.to_bytes_xonly()
     e = (
         int_from_bytes(
-            tagged_hash(
-                tag_prefix + "/challenge", R.to_bytes_xonly() + P.to_bytes_xonly() + msg
-            )
+            _tagged_hash_with_msg(tag_prefix + "/challenge", R_bytes + pubkey, msg)
         )
         % GE.ORDER
     )
-    sig = R.to_bytes_xonly() + bytes_from_int((k + e * d) % GE.ORDER)
-    assert schnorr_verify(msg, P.to_bytes_xonly(), sig, tag_prefix=tag_prefix)
-    return sig
+    return R_bytes + bytes_from_int((k + e * d) % GE.ORDER)
 
 
 def schnorr_verify(
-    msg: bytes, pubkey: bytes, sig: bytes, tag_prefix: str = "BIP0340"
+    msg: Message, pubkey: bytes, sig: bytes, tag_prefix: str = "BIP0340"
 ) -> bool:
     if len(pubkey) != 32:
         raise ValueError("The public key must be a 32-byte array.")
@@ -59,15 +118,125 @@ def schnorr_verify(
         P = GE.from_bytes_xonly(pubkey)
     except ValueError:
         return False
+    return schnorr_verify_ge(msg, P, sig, tag_prefix=tag_prefix)
+
+
+def schnorr_verify_ge(
+    msg: Message, pubkey: GE, sig: bytes, tag_prefix: str = "BIP0340"
+) -> bool:
+    """Verify a signature for an already decoded public key.
+
+    This is equivalent to schnorr_verify(msg, pubkey.to_bytes_xonly(), sig,
+    tag_prefix), i.e., only the x-coordinate of pubkey is used, but avoids
+    decoding the public key again."""
+    if len(sig) != 64:
+        raise ValueError("The signature must be a 64-byte array.")
+    pubkey_bytes, P = _xonly_pubkey(pubkey)
     r = int_from_bytes(sig[0:32])
     s = int_from_bytes(sig[32:64])
     if (r >= FE.SIZE) or (s >= GE.ORDER):
         return False
     e = (
-        int_from_bytes(tagged_hash(tag_prefix + "/challenge", sig[0:32] + pubkey + msg))
+        int_from_bytes(
+            _tagged_hash_with_msg(
+                tag_prefix + "/challenge", sig[0:32] + pubkey_bytes, msg
+            )
+        )
         % GE.ORDER
     )
-    R = s * G - e * P
+    R = GE.batch_mul((s, G), (-e, P))
     if R.infinity or (not R.has_even_y()) or (R.x != r):
         return False
     return True
+
+
+def _xonly_pubkey(pubkey: GE) -> Tuple[bytes, GE]:
+    """Return the x-only serialization and the even-y point of pubkey."""
+    if pubkey.infinity:
+        raise ValueError("The public key must not be the point at infinity.")
+    return pubkey.to_bytes_xonly(), pubkey if pubkey.has_even_y() else -pubkey
+
+
+def schnorr_batch_verify(
+    msgs: Sequence[Message],
+    pubkeys: Sequence[Union[bytes, GE]],
+    sigs: Sequence[bytes],
+    tag_prefix: str = "BIP0340",
+) -> bool:
+    """Verify a batch of signatures.
+
+    Returns True if and only if schnorr_verify(msgs[i], pubkeys[i], sigs[i],
+    tag_prefix) returns True for all i (except with negligible probability).
+    Public keys may also be given as already decoded GE objects, in which case
+    they are handled as in schnorr_verify_ge.
+
+    This follows the batch verification algorithm from BIP 340: It checks a
+    random linear combination of the verification equations, which amounts to a
+    single multi-scalar multiplication instead of two scalar multiplications per
+    signature."""
+    u = len(msgs)
+    if len(pubkeys) != u or len(sigs) != u:
+        raise ValueError(
+            "The number of messages, public keys and signatures must match."
+        )
+    for pubkey, sig in zip(pubkeys, sigs):
+        if isinstance(pubkey, bytes) and len(pubkey) != 32:
+            raise ValueError("The public key must be a 32-byte array.")
+        if isinstance(pubkey, GE) and pubkey.infinity:
+            raise ValueError("The public key must not be the point at infinity.")
+        if len(sig) != 64:
+            raise ValueError("The signature must be a 64-byte array.")
+    # We check s_sum*G == sum(a_i*R_i + (a_i*e_i)*P_i) with a_0 = 1 and
+    # random a_1, ..., a_{u-1}.
+    s_sum = 0
+    terms: List[Tuple[int, GE]] = []
+    for i, (msg, pubkey, sig) in enumerate(zip(msgs, pubkeys, sigs)):
+        try:
+            if isinstance(pubkey, GE):
+                pubkey_bytes, P = _xonly_pubkey(pubkey)
+            else:
+                pubkey_bytes, P = pubkey, GE.from_bytes_xonly(pubkey)
+            R = GE.from_bytes_xonly(sig[0:32])
+        except ValueError:
+            return False
+        s = int_from_bytes(sig[32:64])
+        if s >= GE.ORDER:
+            return False
+        e = (
+            int_from_bytes(
+                _tagged_hash_with_msg(
+                    tag_prefix + "/challenge", sig[0:32] + pubkey_bytes, msg
+                )
+            )
+            % GE.ORDER
+        )
+        a = 1 if i == 0 else 1 + randbelow(GE.ORDER - 1)
+        s_sum += a * s
+        terms += [(-a, R), (-a * e, P)]
+    return GE.batch_mul((s_sum, G), *terms).infinity
+
+
+def schnorr_batch_find_invalid(
+    msgs: Sequence[Message],
+    pubkeys: Sequence[Union[bytes, GE]],
+    sigs: Sequence[bytes],
+    tag_prefix: str = "BIP0340",
+) -> Optional[int]:
+    """Find the first invalid signature in a batch.
+
+    Returns None if all signatures are valid, and otherwise the smallest index i
+    such that schnorr_verify(msgs[i], pubkeys[i], sigs[i], tag_prefix) returns
+    False. If all signatures are valid, this is as fast as schnorr_batch_verify.
+    Otherwise, the signatures are verified one by one to identify the first
+    invalid one."""
+    if schnorr_batch_verify(msgs, pubkeys, sigs, tag_prefix):
+        return None
+    for i, (msg, pubkey, sig) in enumerate(zip(msgs, pubkeys, sigs)):
+        if isinstance(pubkey, GE):
+            valid = schnorr_verify_ge(msg, pubkey, sig, tag_prefix)
+        else:
+            valid = schnorr_verify(msg, pubkey, sig, tag_prefix)
+        if not valid:
+            return i
+    # Batch verification never fails if all signatures are valid.
+    assert False
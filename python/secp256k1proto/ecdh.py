@@ -1,6 +1,7 @@
 import hashlib
+from typing import List, Sequence, Union
 
-from .secp256k1 import GE, Scalar
+from .secp256k1 import GE, GEJ, Scalar, ecmult_same_scalar
 
 
 def ecdh_compressed_in_raw_out(seckey: bytes, pubkey: bytes) -> GE:
@@ -14,3 +15,35 @@ def ecdh_libsecp256k1(seckey: bytes, pubkey: bytes) -> bytes:
     """TODO"""
     shared_secret = ecdh_compressed_in_raw_out(seckey, pubkey)
     return hashlib.sha256(shared_secret.to_bytes_compressed()).digest()
+
+
+def ecdh_compressed_in_raw_out_multi(
+    seckey: bytes, pubkeys: Sequence[Union[bytes, GE]]
+) -> List[GE]:
+    """Compute [ecdh_compressed_in_raw_out(seckey, pubkey) for pubkey in pubkeys].
+
+    The secret key is parsed and recoded only once, and the shared secrets are
+    returned in normalized form (using a single inversion for all of them).
+    Public keys may also be given as already decoded GE objects."""
+    a = int(Scalar.from_bytes(seckey))
+    assert a != 0
+    points = [
+        GEJ.from_ge(
+            pubkey if isinstance(pubkey, GE) else GE.from_bytes_compressed(pubkey)
+        )
+        for pubkey in pubkeys
+    ]
+    shared_secrets = [r.to_ge() for r in ecmult_same_scalar(a, points)]
+    assert not any(ss.infinity for ss in shared_secrets)  # prime-order group
+    GE.batch_normalize(shared_secrets)
+    return shared_secrets
+
+
+def ecdh_libsecp256k1_multi(
+    seckey: bytes, pubkeys: Sequence[Union[bytes, GE]]
+) -> List[bytes]:
+    """Compute [ecdh_libsecp256k1(seckey, pubkey) for pubkey in pubkeys]."""
+    return [
+        hashlib.sha256(shared_secret.to_bytes_compressed()).digest()
+        for shared_secret in ecdh_compressed_in_raw_out_multi(seckey, pubkeys)
+    ]
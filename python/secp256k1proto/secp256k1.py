@@ -13,8 +13,25 @@ Exports:
 * FE: class for secp256k1 field elements
 * GE: class for secp256k1 group elements
 * G: the secp256k1 generator point
+* Scalar: class for secp256k1 scalars
+* GEJ: class for secp256k1 group elements in Jacobian coordinates, for internal arithmetic
+* ecmult_multi: multi-scalar multiplication of GEJs
+* FastGEMul: table for fast multiplication with a constant group element
+* fast_g_table: the table for G, optionally cached in the file named by FAST_G_TABLE_ENV
+* load_fast_g_table, write_fast_g_table: read and write tables for G from and to files
+* ecmult: multiplication of a GEJ with a scalar
+* ecmult_same_scalar: multiplication of several GEJs with the same scalar
+* enable_decompression_cache, disable_decompression_cache, decompression_cache: opt-in
+  cache of decoded group elements (see DecompressionCache)
 """
 
+import contextlib
+import hashlib
+import os
+import secrets
+from collections import OrderedDict
+
+
 # TODO Docstrings of methods still say "field element"
 class APrimeFE:
     """Objects of this class represent elements of a prime field.
@@ -25,6 +42,9 @@ class APrimeFE:
     # The size of the field (also its modulus and characteristic).
     SIZE: int
 
+    # Field elements are allocated in large numbers, so avoid a per-instance __dict__.
+    __slots__ = ("_den", "_num")
+
     def __init__(self, a=0, b=1):
         """Initialize a field element a/b; both a and b can be ints or field elements."""
         if isinstance(a, type(self)):
@@ -44,12 +64,26 @@ class APrimeFE:
         self._num = num
         self._den = den
 
+    @classmethod
+    def _from_ints_unchecked(cls, num, den=1):
+        """Initialize a field element num/den from ints num and den != 0 that are already
+        reduced modulo SIZE. This skips the type dispatch of the constructor and is meant
+        for results of arithmetic."""
+        r = cls.__new__(cls)
+        r._num = num
+        r._den = den if num != 0 else 1
+        return r
+
     def __add__(self, a):
         """Compute the sum of two field elements (second may be int)."""
+        p = self.SIZE
         if isinstance(a, type(self)):
-            return type(self)(self._num * a._den + self._den * a._num, self._den * a._den)
+            if self._den == a._den:
+                return self._from_ints_unchecked((self._num + a._num) % p, self._den)
+            return self._from_ints_unchecked(
+                (self._num * a._den + self._den * a._num) % p, self._den * a._den % p)
         if isinstance(a, int):
-            return type(self)(self._num + self._den * a, self._den)
+            return self._from_ints_unchecked((self._num + self._den * a) % p, self._den)
         return NotImplemented
 
     def __radd__(self, a):
@@ -68,10 +102,14 @@ class APrimeFE:
 
     def __sub__(self, a):
         """Compute the difference of two field elements (second may be int)."""
+        p = self.SIZE
         if isinstance(a, type(self)):
-            return type(self)(self._num * a._den - self._den * a._num, self._den * a._den)
+            if self._den == a._den:
+                return self._from_ints_unchecked((self._num - a._num) % p, self._den)
+            return self._from_ints_unchecked(
+                (self._num * a._den - self._den * a._num) % p, self._den * a._den % p)
         if isinstance(a, int):
-            return type(self)(self._num - self._den * a, self._den)
+            return self._from_ints_unchecked((self._num - self._den * a) % p, self._den)
         return NotImplemented
 
     def __rsub__(self, a):
@@ -80,10 +118,11 @@ class APrimeFE:
 
     def __mul__(self, a):
         """Compute the product of two field elements (second may be int)."""
+        p = self.SIZE
         if isinstance(a, type(self)):
-            return type(self)(self._num * a._num, self._den * a._den)
+            return self._from_ints_unchecked(self._num * a._num % p, self._den * a._den % p)
         if isinstance(a, int):
-            return type(self)(self._num * a, self._den)
+            return self._from_ints_unchecked(self._num * a % p, self._den)
         return NotImplemented
 
     def __rmul__(self, a):
@@ -102,7 +141,7 @@ class APrimeFE:
 
     def __neg__(self):
         """Negate a field element."""
-        return type(self)(-self._num, self._den)
+        return self._from_ints_unchecked(-self._num % self.SIZE, self._den)
 
     def __int__(self):
         """Convert a field element to an integer in range 0..SIZE-1. The result is cached."""
@@ -111,6 +150,34 @@ class APrimeFE:
             self._den = 1
         return self._num
 
+    @classmethod
+    def batch_normalize(cls, es):
+        """Bring a list of field elements into canonical form in place, using a single
+        inversion.
+
+        This has the same effect as calling int(e) for every e in es, but uses Montgomery's
+        simultaneous inversion trick: one inversion plus 3(n-1) multiplications for n
+        denominators."""
+        # Deduplicate by identity: The same object may occur several times (e.g., GE.__neg__
+        # shares the x coordinate between P and -P), but must be normalized only once.
+        es = list({id(e): e for e in es if e._den != 1}.values())
+        if not es:
+            return
+        # prefixes[i] is the product of the denominators of es[0..i-1].
+        prefixes = []
+        acc = 1
+        for e in es:
+            prefixes.append(acc)
+            acc = (acc * e._den) % cls.SIZE
+        # Invariant: inv is the inverse of the product of the denominators of es[0..i].
+        inv = pow(acc, -1, cls.SIZE)
+        for i in range(len(es) - 1, -1, -1):
+            e = es[i]
+            den_inv = (inv * prefixes[i]) % cls.SIZE
+            inv = (inv * e._den) % cls.SIZE
+            e._num = (e._num * den_inv) % cls.SIZE
+            e._den = 1
+
     def sqrt(self):
         """Compute the square root of a field element if it exists (None otherwise)."""
         raise NotImplementedError
@@ -153,6 +220,7 @@ class APrimeFE:
 
 class FE(APrimeFE):
     SIZE = 2**256 - 2**32 - 977
+    __slots__ = ()
 
     def sqrt(self):
         # Due to the fact that our modulus p is of the form (p % 4) == 3, the Tonelli-Shanks
@@ -175,6 +243,7 @@ class FE(APrimeFE):
 class Scalar(APrimeFE):
     """TODO Docstring"""
     SIZE = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+    __slots__ = ()
 
 
 class GE:
@@ -189,8 +258,13 @@ class GE:
 
     The point at infinity has field:
     * infinity: True
+
+    There is only one GE object for the point at infinity, i.e., GE() always returns the
+    same object.
     """
 
+    __slots__ = ("_infinity", "_x", "_y")
+
     # TODO The following two class attributes should probably be just getters as
     # classmethods to enforce immutability. Unfortunately Python makes it hard
     # to create "classproperties". `G` could then also be just a classmethod.
@@ -218,12 +292,25 @@ class GE:
         assert not self.infinity
         return self._y
 
+    def __new__(cls, x=None, y=None):
+        if x is None:
+            return _GE_INFINITY
+        return object.__new__(cls)
+
+    def __reduce__(self):
+        """Support copying and pickling.
+
+        The default implementation would call __new__ without arguments, which returns the
+        interned point at infinity, and then overwrite its coordinates."""
+        if self.infinity:
+            return (GE, ())
+        return (GE._from_fe_unchecked, (self._x, self._y))
+
     def __init__(self, x=None, y=None):
         """Initialize a group element with specified x and y coordinates, or infinity."""
         if x is None:
-            # Initialize as infinity.
+            # The point at infinity is interned (see __new__) and initialized already.
             assert y is None
-            self._infinity = True
         else:
             # Initialize as point on the curve (and check that it is).
             fx = FE(x)
@@ -233,6 +320,16 @@ class GE:
             self._x = fx
             self._y = fy
 
+    @staticmethod
+    def _from_fe_unchecked(x, y):
+        """Initialize a non-infinite group element from field elements without checking
+        the curve equation. Only for results of arithmetic on valid group elements."""
+        r = object.__new__(GE)
+        r._infinity = False
+        r._x = x
+        r._y = y
+        return r
+
     def __add__(self, a):
         """Add two group elements together."""
         # Deal with infinity: a + infinity == infinity + a == a.
@@ -240,28 +337,17 @@ class GE:
             return a
         if a.infinity:
             return self
-        if self.x == a.x:
-            if self.y != a.y:
-                # A point added to its own negation is infinity.
-                assert self.y + a.y == 0
-                return GE()
-            else:
-                # For identical inputs, use the tangent (doubling formula).
-                lam = (3 * self.x**2) / (2 * self.y)
-        else:
-            # For distinct inputs, use the line through both points (adding formula).
-            lam = (self.y - a.y) / (self.x - a.x)
-        # Determine point opposite to the intersection of that line with the curve.
-        x = lam**2 - (self.x + a.x)
-        y = lam * (self.x - x) - self.y
-        return GE(x, y)
+        return (GEJ.from_ge(self) + GEJ.from_ge(a)).to_ge()
 
     @staticmethod
     def sum(*ps):
         """Compute the sum of group elements.
 
         GE.sum(a, b, c, ...) is identical to (GE() + a + b + c + ...)."""
-        return sum(ps, start=GE())
+        r = GEJ()
+        for p in ps:
+            r += GEJ.from_ge(p)
+        return r.to_ge()
 
     @staticmethod
     def batch_mul(*aps):
@@ -270,30 +356,40 @@ class GE:
         GE.batch_mul((a1, p1), (a2, p2), (a3, p3)) is identical to a1*p1 + a2*p2 + a3*p3,
         but more efficient."""
         # Reduce all the scalars modulo order first (so we can deal with negatives etc).
-        naps = [(int(a), p) for a, p in aps]
-        # Start with point at infinity.
-        r = GE()
-        # Iterate over all bit positions, from high to low.
-        for i in range(255, -1, -1):
-            # Double what we have so far.
-            r = r + r
-            # Add then add the points for which the corresponding scalar bit is set.
-            for (a, p) in naps:
-                if (a >> i) & 1:
-                    r += p
-        return r
+        naps = [(int(a) % GE.ORDER, p) for a, p in aps]
+        # Terms with a zero scalar or an infinite point do not contribute.
+        naps = [(a, p) for a, p in naps if a != 0 and not p.infinity]
+        # Terms with G are handled by the fixed-base multiplication, which is much cheaper.
+        ng = sum(a for a, p in naps if p == G) % GE.ORDER
+        terms = [(a, GEJ.from_ge(p)) for a, p in naps if p != G]
+        r = ecmult_multi(terms)
+        if ng != 0:
+            r += fast_g_table().mul_gej(ng)
+        return r.to_ge()
+
+    @staticmethod
+    def batch_normalize(ps):
+        """Bring the coordinates of a list of group elements into canonical form in place,
+        using a single inversion.
+
+        Call this before serializing many group elements that are results of arithmetic,
+        which would otherwise need an inversion each."""
+        FE.batch_normalize([c for p in ps if not p.infinity for c in (p.x, p.y)])
 
     def __rmul__(self, a):
         """Multiply an integer with a group element."""
         if self == G:
-            return FAST_G.mul(Scalar(a))
-        return GE.batch_mul((Scalar(a), self))
+            return fast_g_table().mul(Scalar(a))
+        a = int(Scalar(a))
+        if a == 0 or self.infinity:
+            return GE()
+        return ecmult(a, GEJ.from_ge(self)).to_ge()
 
     def __neg__(self):
         """Compute the negation of a group element."""
         if self.infinity:
             return self
-        return GE(self.x, -self.y)
+        return GE._from_fe_unchecked(self.x, -self.y)
 
     def __sub__(self, a):
         """Subtract a group element from another."""
@@ -301,7 +397,9 @@ class GE:
 
     def __eq__(self, a):
         """Check if two group elements are equal."""
-        return (self - a).infinity
+        if self._infinity or a._infinity:
+            return self._infinity and a._infinity
+        return self._x == a._x and self._y == a._y
 
     def has_even_y(self):
         """Determine whether a non-infinity group element has an even y coordinate."""
@@ -311,6 +409,11 @@ class GE:
     def to_bytes_compressed(self):
         """Convert a non-infinite group element to 33-byte compressed encoding."""
         assert not self.infinity
+        cache = _DECOMPRESSION_CACHE
+        if cache is not None:
+            b = cache.encoding(self)
+            if b is not None:
+                return b
         return bytes([3 - self.y.is_even()]) + self.x.to_bytes()
 
     def to_bytes_compressed_with_infinity(self):
@@ -327,6 +430,11 @@ class GE:
     def to_bytes_xonly(self):
         """Convert (the x coordinate of) a non-infinite group element to 32-byte xonly encoding."""
         assert not self.infinity
+        cache = _DECOMPRESSION_CACHE
+        if cache is not None:
+            b = cache.encoding(self)
+            if b is not None:
+                return b[1:]
         return self.x.to_bytes()
 
     @staticmethod
@@ -337,7 +445,8 @@ class GE:
             raise ValueError
         if not y.is_even():
             y = -y
-        return GE(x, y)
+        # The curve equation holds by construction of y.
+        return GE._from_fe_unchecked(FE(x), y)
 
     @staticmethod
     def from_bytes_compressed(b):
@@ -345,12 +454,28 @@ class GE:
         assert len(b) == 33
         if b[0] != 2 and b[0] != 3:
             raise ValueError
+        cache = _DECOMPRESSION_CACHE
+        if cache is not None:
+            # Normalize the key, b may be any bytes-like object (e.g., a memoryview).
+            key = bytes(b)
+            r = cache.lookup(key)
+            if r is not None:
+                return r
         x = FE.from_bytes(b[1:])
         r = GE.lift_x(x)
         if b[0] == 3:
             r = -r
+        if cache is not None:
+            cache.insert(key, r)
         return r
 
+    @staticmethod
+    def from_bytes_compressed_with_infinity(b):
+        """Convert a compressed to a group element, mapping zeros to infinity."""
+        if b == 33 * b"\x00":
+            return GE()
+        return GE.from_bytes_compressed(b)
+
     @staticmethod
     def from_bytes_uncompressed(b):
         """Convert an uncompressed to a group element."""
@@ -361,7 +486,7 @@ class GE:
         y = FE.from_bytes(b[33:])
         if y**2 != x**3 + 7:
             raise ValueError
-        return GE(x, y)
+        return GE._from_fe_unchecked(x, y)
 
     @staticmethod
     def from_bytes(b):
@@ -376,8 +501,17 @@ class GE:
     def from_bytes_xonly(b):
         """Convert a point given in xonly encoding to a group element."""
         assert len(b) == 32
+        cache = _DECOMPRESSION_CACHE
+        if cache is not None:
+            # lift_x returns the point with even y, whose compressed encoding is 0x02 || x.
+            key = b"\x02" + bytes(b)
+            r = cache.lookup(key)
+            if r is not None:
+                return r
         x = FE.from_bytes(b)
         r = GE.lift_x(x)
+        if cache is not None:
+            cache.insert(key, r)
         return r
 
     @staticmethod
@@ -404,6 +538,460 @@ class GE:
         return int(self.x)
 
 
+# The interned point at infinity.
+_GE_INFINITY = object.__new__(GE)
+_GE_INFINITY._infinity = True
+
+
+class DecompressionCache:
+    """Bounded LRU cache of decoded group elements and their encodings.
+
+    The cache maps 33-byte compressed encodings to GE objects, so that decoding the
+    same point repeatedly (e.g., a host public key in every session) skips the square
+    root in lift_x. It also remembers the encoding of each cached GE object, so that
+    encoding such an object again (e.g., when hashing a decoded public key) is free.
+    Only decoding inserts into the cache; encoding a point that has not been obtained
+    from the cache never stores it, so points computed from secrets (such as ECDH
+    shared secrets) are never retained.
+
+    WARNING: Whether a lookup hits the cache is observable via timing. Enable the cache
+    only if all encodings that are ever decoded are public and independent of secret
+    data (e.g., public keys, commitments and signatures received from other parties).
+    """
+
+    def __init__(self, maxsize):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        # Compressed encoding -> GE, in LRU order (least recently used first)
+        self._points = OrderedDict()
+        # id(GE) -> compressed encoding, for every GE in _points
+        self._encodings = {}
+        self.hits = 0
+        self.misses = 0
+        self.encoding_hits = 0
+        self.encoding_misses = 0
+
+    def __len__(self):
+        return len(self._points)
+
+    def lookup(self, b):
+        """Return the cached group element with compressed encoding b, or None."""
+        r = self._points.get(b)
+        if r is None:
+            self.misses += 1
+            return None
+        self._points.move_to_end(b)
+        self.hits += 1
+        return r
+
+    def encoding(self, p):
+        """Return the compressed encoding of the cached GE object p, or None."""
+        b = self._encodings.get(id(p))
+        if b is None:
+            self.encoding_misses += 1
+            return None
+        self._points.move_to_end(b)
+        self.encoding_hits += 1
+        return b
+
+    def insert(self, b, p):
+        """Insert the group element p with compressed encoding b."""
+        old = self._points.pop(b, None)
+        if old is not None:
+            del self._encodings[id(old)]
+        # Entries hold a reference to p, so id(p) is not reused while p is cached.
+        self._points[b] = p
+        self._encodings[id(p)] = b
+        while len(self._points) > self.maxsize:
+            _, evicted = self._points.popitem(last=False)
+            del self._encodings[id(evicted)]
+
+    def stats(self):
+        """Return a dict with the number of cached points and hit/miss counters."""
+        return {
+            "size": len(self._points),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "encoding_hits": self.encoding_hits,
+            "encoding_misses": self.encoding_misses,
+        }
+
+    def clear(self):
+        """Remove all cached points and reset the counters."""
+        self._points.clear()
+        self._encodings.clear()
+        self.hits = self.misses = 0
+        self.encoding_hits = self.encoding_misses = 0
+
+
+# The cache used by GE.from_bytes_compressed, GE.from_bytes_xonly, GE.to_bytes_compressed
+# and GE.to_bytes_xonly, or None if caching is disabled (see enable_decompression_cache)
+_DECOMPRESSION_CACHE = None
+
+
+def enable_decompression_cache(maxsize=4096):
+    """Enable the cache of decoded group elements shared by all GE objects and return it.
+
+    If the cache is already enabled, it is replaced by an empty cache with the given
+    maximum number of entries. See DecompressionCache for when it is safe to enable the
+    cache; it is disabled by default."""
+    global _DECOMPRESSION_CACHE
+    _DECOMPRESSION_CACHE = DecompressionCache(maxsize)
+    return _DECOMPRESSION_CACHE
+
+
+def disable_decompression_cache():
+    """Disable and drop the cache of decoded group elements."""
+    global _DECOMPRESSION_CACHE
+    _DECOMPRESSION_CACHE = None
+
+
+def decompression_cache():
+    """Return the cache of decoded group elements, or None if it is disabled."""
+    return _DECOMPRESSION_CACHE
+
+
+class GEJ:
+    """Objects of this class represent secp256k1 group elements in Jacobian coordinates.
+
+    A triple (x, y, z) of integers modulo the field size with z != 0 represents the affine
+    point (x/z^2, y/z^3); z == 0 represents the point at infinity. In contrast to GE,
+    additions and doublings need neither modular inversions nor curve equation checks, so
+    arithmetic-heavy code should use GEJ internally and convert to GE only at the end.
+
+    GEJ objects are immutable.
+    """
+
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x=0, y=1, z=0):
+        """Initialize a group element from Jacobian coordinates (the default is infinity)."""
+        self.x = x
+        self.y = y
+        self.z = z
+
+    @staticmethod
+    def from_ge(a):
+        """Convert a GE to Jacobian coordinates (without inversions)."""
+        if a._infinity:
+            return GEJ()
+        xn, xd = a._x._num, a._x._den
+        yn, yd = a._y._num, a._y._den
+        if xd == 1 and yd == 1:
+            return GEJ(xn, yn, 1)
+        # With x = xn/xd and y = yn/yd, use z = xd*yd.
+        p = FE.SIZE
+        yd2 = yd * yd % p
+        return GEJ(xn * xd * yd2 % p, yn * pow(xd, 3, p) * yd2 % p, xd * yd % p)
+
+    @property
+    def infinity(self):
+        """Whether the group element is the point at infinity."""
+        return self.z == 0
+
+    def to_ge(self):
+        """Convert to a GE, keeping coordinates in fraction form (without inversions)."""
+        if self.z == 0:
+            return GE()
+        z2 = self.z * self.z % FE.SIZE
+        return GE._from_fe_unchecked(FE(self.x, z2), FE(self.y, z2 * self.z))
+
+    @staticmethod
+    def batch_normalize(ps):
+        """Convert a list of GEJs to equivalent ones with z == 1 (or infinity), using a single
+        inversion.
+
+        This is useful for precomputed tables, which can then be used in mixed additions."""
+        p = FE.SIZE
+        # Inverting z is enough: 1/z^2 and 1/z^3 follow with a few multiplications.
+        zinvs = [FE(1, a.z) for a in ps if a.z != 0]
+        FE.batch_normalize(zinvs)
+        zinvs.reverse()
+        r = []
+        for a in ps:
+            if a.z == 0:
+                r.append(GEJ())
+                continue
+            zi = zinvs.pop()._num
+            zi2 = zi * zi % p
+            r.append(GEJ(a.x * zi2 % p, a.y * zi2 * zi % p, 1))
+        return r
+
+    def double(self):
+        """Compute twice a group element."""
+        p = FE.SIZE
+        x, y, z = self.x, self.y, self.z
+        if z == 0 or y == 0:
+            return GEJ()
+        yy = y * y % p
+        s = 4 * x * yy % p
+        m = 3 * x * x % p
+        x3 = (m * m - 2 * s) % p
+        y3 = (m * (s - x3) - 8 * yy * yy) % p
+        z3 = 2 * y * z % p
+        return GEJ(x3, y3, z3)
+
+    def __add__(self, a):
+        """Add two group elements together (mixed addition if a has z == 1)."""
+        if self.z == 0:
+            return a
+        if a.z == 0:
+            return self
+        p = FE.SIZE
+        x1, y1, z1 = self.x, self.y, self.z
+        z1z1 = z1 * z1 % p
+        u2 = a.x * z1z1 % p
+        s2 = a.y * z1z1 * z1 % p
+        if a.z == 1:
+            u1, s1 = x1, y1
+        else:
+            z2z2 = a.z * a.z % p
+            u1 = x1 * z2z2 % p
+            s1 = y1 * z2z2 * a.z % p
+        h = (u2 - u1) % p
+        r = (s2 - s1) % p
+        if h == 0:
+            if r == 0:
+                # For identical inputs, use the doubling formula.
+                return self.double()
+            # A point added to its own negation is infinity.
+            return GEJ()
+        hh = h * h % p
+        hhh = h * hh % p
+        v = u1 * hh % p
+        x3 = (r * r - hhh - 2 * v) % p
+        y3 = (r * (v - x3) - s1 * hhh) % p
+        z3 = z1 * a.z * h % p
+        return GEJ(x3, y3, z3)
+
+    def __neg__(self):
+        """Compute the negation of a group element."""
+        return GEJ(self.x, -self.y % FE.SIZE, self.z)
+
+    def mul_lambda(self):
+        """Multiply a group element with LAMBDA, using the endomorphism."""
+        return GEJ(self.x * BETA % FE.SIZE, self.y, self.z)
+
+
+# The secp256k1 curve has an efficiently computable endomorphism: For every point p = (x, y),
+# we have LAMBDA*p = (BETA*x, y), where LAMBDA is a cube root of unity modulo the group
+# order and BETA is a cube root of unity modulo the field size.
+LAMBDA = 0x5363AD4CC05C30E0A5261C028812645A122E22EA20816678DF02967C1B23BD72
+BETA = 0x7AE96A2B657C07106E64479EAC3434E99CF0497512F58995C1396C28719501EE
+
+# A reduced basis {(A1, B1), (A2, B2)} of the lattice {(k1, k2) : k1 + k2*LAMBDA == 0 mod
+# ORDER}, used to split scalars in split_lambda.
+GLV_A1 = 0x3086D221A7D46BCDE86C90E49284EB15
+GLV_B1 = -0xE4437ED6010E88286F547FA90ABFE4C3
+GLV_A2 = 0x114CA50F7A8E2F3F657C1108D9D44CFD8
+GLV_B2 = GLV_A1
+
+
+def split_lambda(k):
+    """Split an integer k in range 0..ORDER-1 into a pair (k1, k2) of integers such that
+    k1 + k2*LAMBDA == k (mod ORDER) and abs(k1), abs(k2) < 2^128.
+
+    This is the GLV method (Gallant, Lambert, Vanstone: "Faster Point Multiplication on
+    Elliptic Curves with Efficient Endomorphisms"): k*p is computed as k1*p + k2*(LAMBDA*p),
+    which needs only half as many doublings. The pair (k1, k2) is obtained by subtracting
+    from (k, 0) the closest lattice vector found by rounding (Babai's rounding method)."""
+    n = GE.ORDER
+    c1 = (2 * GLV_B2 * k + n) // (2 * n)
+    c2 = (-2 * GLV_B1 * k + n) // (2 * n)
+    k1 = k - c1 * GLV_A1 - c2 * GLV_A2
+    k2 = -c1 * GLV_B1 - c2 * GLV_B2
+    return k1, k2
+
+
+def wnaf(a, w):
+    """Compute the width-w NAF of a non-negative integer, least significant digit first.
+
+    Every nonzero digit is odd and has absolute value below 2^(w-1), and any w consecutive
+    digits contain at most one nonzero digit."""
+    digits = []
+    while a:
+        if a & 1:
+            d = a & ((1 << w) - 1)
+            if d >= 1 << (w - 1):
+                d -= 1 << w
+            a -= d
+        else:
+            d = 0
+        digits.append(d)
+        a >>= 1
+    return digits
+
+
+def odd_multiples(p, w):
+    """Compute the table [p, 3*p, 5*p, ..., (2^(w-1)-1)*p] of a GEJ."""
+    p2 = p.double()
+    table = [p]
+    for _ in range((1 << (w - 2)) - 1):
+        table.append(table[-1] + p2)
+    return table
+
+
+# Window size used by the Strauss algorithm.
+STRAUSS_WINDOW = 5
+
+# Up to this number of terms, ecmult_multi uses the Strauss algorithm. (Tuned empirically.)
+PIPPENGER_THRESHOLD = 40
+
+
+def ecmult_multi_strauss(terms):
+    """Compute sum(a*p for (a, p) in terms) with the Strauss algorithm (interleaved wNAF).
+
+    The points are GEJs, and the scalars are integers in range 1..ORDER-1. Every term is
+    split into two terms with half-size scalars using the endomorphism (see split_lambda),
+    which halves the number of doublings."""
+    # Normalize all tables at once, so that the main loop can use mixed additions.
+    tsize = 1 << (STRAUSS_WINDOW - 2)
+    entries = GEJ.batch_normalize([e for _, p in terms for e in odd_multiples(p, STRAUSS_WINDOW)])
+    # adds[i] is the list of table entries to be added after the i-th doubling, counting
+    # from the least significant digit position.
+    adds = [[] for _ in range(130)]
+    for i, (a, _) in enumerate(terms):
+        table = entries[i * tsize:(i + 1) * tsize]
+        # The table for LAMBDA*p is obtained from the table for p almost for free.
+        table_lam = [e.mul_lambda() for e in table]
+        for k, t in zip(split_lambda(a), (table, table_lam)):
+            if k < 0:
+                k, t = -k, [-e for e in t]
+            for j, d in enumerate(wnaf(k, STRAUSS_WINDOW)):
+                if d > 0:
+                    adds[j].append(t[d >> 1])
+                elif d < 0:
+                    adds[j].append(-t[-d >> 1])
+    while adds and not adds[-1]:
+        adds.pop()
+    r = GEJ()
+    for points in reversed(adds):
+        r = r.double()
+        for p in points:
+            r += p
+    return r
+
+
+def ecmult(a, p):
+    """Compute a*p for a GEJ p and an integer a in range 1..ORDER-1.
+
+    This is the special case of the Strauss algorithm for a single point: Both halves of the
+    split scalar are recoded in width-STRAUSS_WINDOW NAF, and a small table of odd multiples
+    of p is computed per call."""
+    return ecmult_multi_strauss([(a, p)])
+
+
+def ecmult_same_scalar(a, ps):
+    """Compute [a*p for p in ps] for a list of GEJs ps and an integer a in range 1..ORDER-1.
+
+    This is faster than separate calls to ecmult: The scalar is split and recoded only once,
+    and the tables of odd multiples of all points are normalized with a single inversion."""
+    tsize = 1 << (STRAUSS_WINDOW - 2)
+    # schedule[i] is the list of (table, index, negate) triples describing the table entries
+    # to be added after the i-th doubling, counting from the least significant position.
+    schedule = [[] for _ in range(130)]
+    for t, k in enumerate(split_lambda(a)):
+        negate = k < 0
+        for j, d in enumerate(wnaf(abs(k), STRAUSS_WINDOW)):
+            if d != 0:
+                schedule[j].append((t, abs(d) >> 1, (d < 0) != negate))
+    while schedule and not schedule[-1]:
+        schedule.pop()
+    schedule.reverse()
+    entries = GEJ.batch_normalize([e for p in ps for e in odd_multiples(p, STRAUSS_WINDOW)])
+    results = []
+    for i in range(len(ps)):
+        table = entries[i * tsize:(i + 1) * tsize]
+        tables = (table, [e.mul_lambda() for e in table])
+        r = GEJ()
+        for adds in schedule:
+            r = r.double()
+            for t, j, negate in adds:
+                r += -tables[t][j] if negate else tables[t][j]
+        results.append(r)
+    return results
+
+
+# Bucket window sizes used by the Pippenger algorithm, as pairs (maximum number of terms,
+# window size). These have been tuned empirically for this implementation.
+PIPPENGER_WINDOWS = [
+    (1, 1), (4, 2), (20, 3), (48, 4), (128, 5), (300, 6), (600, 7), (2000, 8), (5000, 9),
+    (12000, 10), (30000, 11),
+]
+
+
+def pippenger_window(n):
+    """Return the bucket window size used by the Pippenger algorithm for n terms."""
+    for max_n, window in PIPPENGER_WINDOWS:
+        if n <= max_n:
+            return window
+    return 12
+
+
+def ecmult_multi_pippenger(terms):
+    """Compute sum(a*p for (a, p) in terms) with the Pippenger (bucket) algorithm.
+
+    The points are GEJs, and the scalars are integers in range 1..ORDER-1. Every term is
+    split into two terms with half-size scalars using the endomorphism (see split_lambda).
+    Scalars are recoded into signed digits of c bits, so that every window needs only
+    2^(c-1) buckets."""
+    split_terms = []
+    for a, p in terms:
+        for k, q in zip(split_lambda(a), (p, p.mul_lambda())):
+            if k < 0:
+                k, q = -k, -q
+            if k != 0:
+                split_terms.append((k, q))
+    terms = split_terms
+    c = pippenger_window(len(terms))
+    nwindows = max((a.bit_length() for a, _ in terms), default=0) // c + 1
+    digits = []
+    for a, _ in terms:
+        ds = []
+        for _ in range(nwindows):
+            d = a & ((1 << c) - 1)
+            a >>= c
+            if d > 1 << (c - 1):
+                d -= 1 << c
+                a += 1
+            ds.append(d)
+        digits.append(ds)
+    r = GEJ()
+    for i in range(nwindows - 1, -1, -1):
+        for _ in range(c):
+            r = r.double()
+        buckets = [GEJ() for _ in range(1 << (c - 1))]
+        for ds, (_, p) in zip(digits, terms):
+            d = ds[i]
+            if d > 0:
+                buckets[d - 1] += p
+            elif d < 0:
+                buckets[-d - 1] += -p
+        # Compute sum((k+1) * buckets[k]) with running sums.
+        running = GEJ()
+        window_sum = GEJ()
+        for bucket in reversed(buckets):
+            running += bucket
+            window_sum += running
+        r += window_sum
+    return r
+
+
+def ecmult_multi(terms):
+    """Compute sum(a*p for (a, p) in terms) for GEJs p and integers a in range 1..ORDER-1.
+
+    Dispatch to the Strauss algorithm for few terms and to the Pippenger algorithm for many
+    terms."""
+    if len(terms) <= PIPPENGER_THRESHOLD:
+        return ecmult_multi_strauss(terms)
+    return ecmult_multi_pippenger(terms)
+
+
+# Default window size (in bits) of the fixed-base multiplication tables of FastGEMul.
+DEFAULT_FAST_GE_MUL_WINDOW = 8
+
 # The secp256k1 generator point
 G = GE.lift_x(0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798)
 
@@ -411,28 +999,181 @@ G = GE.lift_x(0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798
 class FastGEMul:
     """Table for fast multiplication with a constant group element.
 
-    Speed up scalar multiplication with a fixed point P by using a precomputed lookup table with
-    its powers of 2:
+    Speed up scalar multiplication with a fixed point P by using a precomputed fixed-window
+    lookup table. For a window size of w bits, the scalar is split into ceil(256/w) digits
+    of w bits each, and the table has one row per digit position with all nonzero multiples
+    of the corresponding power of 2^w:
 
-        table = [P, 2*P, 4*P, (2^3)*P, (2^4)*P, ..., (2^255)*P]
+        table[i] = [1*(2^(w*i))*P, 2*(2^(w*i))*P, ..., (2^w-1)*(2^(w*i))*P]
 
-    During multiplication, the points corresponding to each bit set in the scalar are added up,
-    i.e. on average ~128 point additions take place.
+    During multiplication, the table entries corresponding to the nonzero digits of the
+    scalar are added up, i.e. at most ceil(256/w) point additions and no doublings take
+    place. The window size trades memory and precomputation time for speed: the table holds
+    ceil(256/w)*(2^w-1) points, e.g. 960 points for w = 4 and 8160 points for w = 8.
     """
 
-    def __init__(self, p):
-        self.table = [p]  # table[i] = (2^i) * p
-        for _ in range(255):
-            p = p + p
-            self.table.append(p)
+    def __init__(self, p, window=DEFAULT_FAST_GE_MUL_WINDOW):
+        assert 1 <= window <= 16
+        self.window = window
+        self.table = []
+        # The entries are normalized so that mul can use mixed additions.
+        base = GEJ.from_ge(p)  # base = (2^(w*i)) * p
+        for _ in range((256 + window - 1) // window):
+            base = GEJ.batch_normalize([base])[0]
+            row = [base]
+            for _ in range((1 << window) - 2):
+                row.append(row[-1] + base)
+            self.table.append(GEJ.batch_normalize(row))
+            base = row[-1] + base
+        self.mask = (1 << window) - 1
 
     def mul(self, a):
-        result = GE()
-        a = int(a)
-        for bit in range(a.bit_length()):
-            if a & (1 << bit):
-                result += self.table[bit]
+        return self.mul_gej(a).to_ge()
+
+    def mul_gej(self, a):
+        """Like mul, but return a GEJ."""
+        result = GEJ()
+        a = int(a) % GE.ORDER
+        for row in self.table:
+            digit = a & self.mask
+            if digit:
+                result += row[digit - 1]
+            a >>= self.window
         return result
 
-# Precomputed table with multiples of G for fast multiplication
-FAST_G = FastGEMul(G)
+    # Header of serialized tables. The version must be increased whenever the layout of the
+    # table changes.
+    SERIALIZATION_MAGIC = b"secp256k1proto FastGEMul table"
+    SERIALIZATION_VERSION = 1
+
+    # Number of randomly chosen entries of deserialized tables that are compared against
+    # freshly computed multiples (in addition to the first and the last entry)
+    SPOT_CHECKS = 4
+
+    def to_bytes(self):
+        """Serialize the table.
+
+        The serialization consists of a header (magic bytes, version, window size), a SHA256
+        checksum, and the x and y coordinates (32 bytes each) of all table entries."""
+        header = self.SERIALIZATION_MAGIC + bytes([self.SERIALIZATION_VERSION, self.window])
+        payload = b"".join(
+            e.x.to_bytes(32, 'big') + e.y.to_bytes(32, 'big') for row in self.table for e in row
+        )
+        return header + hashlib.sha256(header + payload).digest() + payload
+
+    @classmethod
+    def from_bytes(cls, b, p):
+        """Deserialize a table for the group element p, as created by to_bytes.
+
+        Raise ValueError if b is not a valid serialization of a table for p of the current
+        version. Apart from checking the checksum, the first and the last entry, and a few
+        randomly chosen entries are compared against freshly computed multiples of p. This
+        detects corrupted or outdated tables, but not a deliberately crafted table with
+        few wrong entries, so b must still come from a trusted source."""
+        header_len = len(cls.SERIALIZATION_MAGIC) + 2
+        if len(b) < header_len + 32 or not b.startswith(cls.SERIALIZATION_MAGIC):
+            raise ValueError("Not a FastGEMul table")
+        version, window = b[header_len - 2], b[header_len - 1]
+        if version != cls.SERIALIZATION_VERSION:
+            raise ValueError("Unsupported FastGEMul table version")
+        if not 1 <= window <= 16:
+            raise ValueError("Invalid window size")
+        nrows = (256 + window - 1) // window
+        nentries = (1 << window) - 1
+        header, checksum, payload = b[:header_len], b[header_len:header_len + 32], b[header_len + 32:]
+        if len(payload) != 64 * nrows * nentries:
+            raise ValueError("Invalid FastGEMul table length")
+        if hashlib.sha256(header + payload).digest() != checksum:
+            raise ValueError("Invalid FastGEMul table checksum")
+        table = cls.__new__(cls)
+        table.window = window
+        table.mask = nentries
+        table.table = []
+        for i in range(nrows):
+            row = []
+            for j in range(nentries):
+                offset = 64 * (i * nentries + j)
+                x = int.from_bytes(payload[offset:offset + 32], 'big')
+                y = int.from_bytes(payload[offset + 32:offset + 64], 'big')
+                row.append(GEJ(x, y, 1))
+            table.table.append(row)
+        first = table.table[0][0]
+        if p.infinity or (first.x, first.y) != (int(p.x), int(p.y)):
+            raise ValueError("FastGEMul table is not for the expected group element")
+        # The last entry depends on the computation of all rows.
+        checks = [(nrows - 1, nentries - 1)]
+        checks += [(secrets.randbelow(nrows), secrets.randbelow(nentries))
+                   for _ in range(cls.SPOT_CHECKS)]
+        for i, j in checks:
+            # table[i][j] = (j+1)*(2^(w*i))*p, which is never infinity because the order is
+            # a prime larger than the multiplier.
+            k = ((j + 1) << (window * i)) % GE.ORDER
+            expected = ecmult_multi([(k, GEJ.from_ge(p))]).to_ge()
+            entry = table.table[i][j]
+            if (entry.x, entry.y) != (int(expected.x), int(expected.y)):
+                raise ValueError("Invalid FastGEMul table entry")
+        return table
+
+
+# Environment variable naming a file in which the table with multiples of G for fast
+# multiplication is cached across processes (see fast_g_table)
+FAST_G_TABLE_ENV = "SECP256K1PROTO_FAST_G_TABLE"
+
+# Precomputed table with multiples of G for fast multiplication (built by fast_g_table)
+_FAST_G = None
+
+
+def load_fast_g_table(path):
+    """Load a table with multiples of G for fast multiplication from a file.
+
+    Raise OSError if the file cannot be read and ValueError if it does not contain a valid
+    table (e.g., because it has been written by a different version). Since a crafted table
+    can pass the checks of FastGEMul.from_bytes, the file must be writable only by trusted
+    users."""
+    with open(path, 'rb') as f:
+        return FastGEMul.from_bytes(f.read(), G)
+
+
+def write_fast_g_table(path, table=None):
+    """Write a table with multiples of G for fast multiplication to a file.
+
+    If table is None, the table used by fast_g_table is written. The file is replaced
+    atomically, so concurrent readers never see a partially written table."""
+    if table is None:
+        table = fast_g_table()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(table.to_bytes())
+    os.replace(tmp_path, path)
+
+
+def fast_g_table():
+    """Return the table with multiples of G for fast multiplication, creating it on first use.
+
+    Since computing the table takes a while, it is not computed at import time. If the
+    environment variable SECP256K1PROTO_FAST_G_TABLE is set to a file name, the table is
+    loaded from that file. If the file does not exist or does not contain a valid table,
+    the table is computed and (if possible) written to the file, so that subsequent
+    processes can load it. The file must be writable only by trusted users (see
+    load_fast_g_table)."""
+    global _FAST_G
+    if _FAST_G is None:
+        path = os.environ.get(FAST_G_TABLE_ENV)
+        table = None
+        if path:
+            with contextlib.suppress(OSError, ValueError):
+                table = load_fast_g_table(path)
+        if table is None:
+            table = FastGEMul(G)
+            if path:
+                with contextlib.suppress(OSError):
+                    write_fast_g_table(path, table)
+        _FAST_G = table
+    return _FAST_G
+
+
+def __getattr__(name):
+    # FAST_G used to be computed at import time; keep it available as a lazy attribute.
+    if name == "FAST_G":
+        return fast_g_table()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
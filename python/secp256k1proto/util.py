@@ -1,11 +1,31 @@
 import hashlib
+from typing import Dict
+
+# SHA256 midstates after hashing the 64-byte prefix tag_hash || tag_hash of a
+# tagged hash, per tag. Callers use only a handful of fixed tags, but since tags
+# can be chosen by callers (e.g., the tag_prefix in bip340), the number of cached
+# midstates is bounded nevertheless.
+_TAGGED_HASH_MIDSTATES: Dict[str, "hashlib._Hash"] = {}
+_TAGGED_HASH_MIDSTATES_MAX = 256
+
+
+def tagged_hash_init(tag: str) -> "hashlib._Hash":
+    # Return a SHA256 object that has already absorbed the prefix of a tagged
+    # hash with the given tag. Feeding it msg (possibly in several chunks via
+    # update()) yields tagged_hash(tag, msg) as digest.
+    midstate = _TAGGED_HASH_MIDSTATES.get(tag)
+    if midstate is None:
+        tag_hash = hashlib.sha256(tag.encode()).digest()
+        midstate = hashlib.sha256(tag_hash + tag_hash)
+        if len(_TAGGED_HASH_MIDSTATES) < _TAGGED_HASH_MIDSTATES_MAX:
+            _TAGGED_HASH_MIDSTATES[tag] = midstate
+    return midstate.copy()
 
 
-# This implementation can be sped up by storing the midstate after hashing
-# tag_hash instead of rehashing it all the time.
 def tagged_hash(tag: str, msg: bytes) -> bytes:
-    tag_hash = hashlib.sha256(tag.encode()).digest()
-    return hashlib.sha256(tag_hash + tag_hash + msg).digest()
+    h = tagged_hash_init(tag)
+    h.update(msg)
+    return h.digest()
 
 
 def bytes_from_int(x: int) -> bytes:
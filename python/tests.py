@@ -2,13 +2,39 @@
 
 """Tests for ChillDKG reference implementation"""
 
+import copy
+import pickle
+from hashlib import sha256
 from itertools import combinations
-from random import randint
+from random import randint, sample
 from typing import Tuple, List, Optional
 from secrets import token_bytes as random_bytes
 
-from secp256k1proto.secp256k1 import GE, G, Scalar
+from secp256k1proto.secp256k1 import (
+    FE,
+    GE,
+    G,
+    Scalar,
+    FastGEMul,
+    BETA,
+    LAMBDA,
+    split_lambda,
+    enable_decompression_cache,
+    disable_decompression_cache,
+    decompression_cache,
+)
+from secp256k1proto.bip340 import (
+    pubkey_gen,
+    schnorr_sign,
+    schnorr_keypair,
+    schnorr_sign_keypair,
+    schnorr_verify,
+    schnorr_verify_ge,
+    schnorr_batch_verify,
+    schnorr_batch_find_invalid,
+)
 from secp256k1proto.keys import pubkey_gen_plain
+from secp256k1proto.util import bytes_from_int, tagged_hash, tagged_hash_init
 
 from chilldkg_ref.util import (
     FaultyParticipantOrCoordinatorError,
@@ -17,6 +43,7 @@ from chilldkg_ref.util import (
     tagged_hash_bip_dkg,
 )
 from chilldkg_ref.vss import Polynomial, VSS, VSSCommitment
+import chilldkg_ref.vss as vss
 import chilldkg_ref.simplpedpop as simplpedpop
 import chilldkg_ref.encpedpop as encpedpop
 import chilldkg_ref.chilldkg as chilldkg
@@ -66,12 +93,256 @@ def test_chilldkg_params_validate():
         assert False, "Expected exception"
 
 
+def test_batch_mul():
+    # Sizes exercise both the Strauss and the Pippenger algorithm.
+    for n in [0, 1, 2, 3, 10, 50, 150]:
+        scalars = [randint(0, GE.ORDER - 1) for _ in range(n)]
+        dlogs = [randint(1, GE.ORDER - 1) for _ in range(n)]
+        # Include some edge cases: infinity, a zero scalar, a negative scalar
+        if n >= 3:
+            dlogs[0] = 0
+            scalars[1] = 0
+            scalars[2] = -scalars[2]
+        points = [dlog * G for dlog in dlogs]
+        # Compare against the fixed-base multiplication with G
+        expected = Scalar.sum(*(Scalar(a) * b for a, b in zip(scalars, dlogs))) * G
+        assert GE.batch_mul(*zip(scalars, points)) == expected
+
+
+def test_split_lambda():
+    # Check the endomorphism using the fixed-base multiplication, which does not
+    # use it
+    d = randint(1, GE.ORDER - 1)
+    P = d * G
+    assert (LAMBDA * d) * G == GE(BETA * P.x, P.y)
+    for k in [0, 1, GE.ORDER - 1] + [randint(0, GE.ORDER - 1) for _ in range(100)]:
+        k1, k2 = split_lambda(k)
+        assert (k1 + k2 * LAMBDA - k) % GE.ORDER == 0
+        assert abs(k1) < 2**128 and abs(k2) < 2**128
+
+
+def test_fast_ge_mul_serialization():
+    P = randint(1, GE.ORDER - 1) * G
+    table = FastGEMul(P, window=3)
+    b = table.to_bytes()
+    loaded = FastGEMul.from_bytes(b, P)
+    for _ in range(5):
+        a = randint(0, GE.ORDER - 1)
+        assert loaded.mul(a) == table.mul(a) == a * P
+
+    # Tables must be rejected if they are for another point, corrupted, or
+    # have a different version.
+    version_pos = len(FastGEMul.SERIALIZATION_MAGIC)
+    other_version = b[:version_pos] + b"\xff" + b[version_pos + 1 :]
+    # A table with a wrong last entry but a valid checksum fails the spot check.
+    table.table[-1][-1] = table.table[0][0]
+    wrong_entry = table.to_bytes()
+    invalid_tables = [
+        (b, G),
+        (b[:-1] + bytes([b[-1] ^ 1]), P),
+        (other_version, P),
+        (wrong_entry, P),
+    ]
+    for invalid, p in invalid_tables:
+        try:
+            FastGEMul.from_bytes(invalid, p)
+        except ValueError:
+            pass
+        else:
+            assert False, "Expected exception"
+
+
+def test_tagged_hash():
+    for tag in ["BIP0340/challenge", "BIP DKG/encpedpop ecdh", ""]:
+        tag_hash = sha256(tag.encode()).digest()
+        for msg in [b"", random_bytes(100)]:
+            expected = sha256(tag_hash + tag_hash + msg).digest()
+            # Call twice to use the cached midstate.
+            assert tagged_hash(tag, msg) == expected
+            assert tagged_hash(tag, msg) == expected
+            h = tagged_hash_init(tag)
+            h.update(msg[:10])
+            h.update(msg[10:])
+            assert h.digest() == expected
+
+
+def test_compact_representations():
+    # The point at infinity is interned.
+    assert GE() is GE()
+    assert G - G is GE()
+    assert GE.sum() is GE()
+    # Field elements, scalars and group elements have no per-instance __dict__.
+    for obj in [FE(1), Scalar(1), G, GE()]:
+        assert not hasattr(obj, "__dict__")
+    assert Scalar(5) - 7 == Scalar(GE.ORDER - 2)
+    assert -Scalar(0) == Scalar(0) and Scalar(3) * 0 == Scalar(0)
+
+    # Copying and pickling group elements works and keeps infinity interned.
+    P = 5 * G
+    points = [P, GE(), -P]
+    for copied in [
+        [copy.copy(Q) for Q in points],
+        copy.deepcopy(points),
+        pickle.loads(pickle.dumps(points)),
+    ]:
+        assert copied == points
+        assert copied[1] is GE()
+    assert GE().infinity and GE() != P
+    assert GE.sum(P, -P) is GE()
+
+
+def test_decompression_cache():
+    points = [randint(1, GE.ORDER - 1) * G for _ in range(3)]
+    encodings = [P.to_bytes_compressed() for P in points]
+    cache = enable_decompression_cache(maxsize=2)
+    try:
+        assert decompression_cache() is cache
+        P0 = GE.from_bytes_compressed(encodings[0])
+        assert P0 == points[0]
+        assert GE.from_bytes_compressed(encodings[0]) is P0
+        assert cache.hits == 1 and cache.misses == 1
+        # Encodings of cached points are remembered.
+        assert P0.to_bytes_compressed() == encodings[0]
+        assert P0.to_bytes_xonly() == encodings[0][1:]
+        assert cache.encoding_hits == 2
+        # Other bytes-like objects are accepted and share the cache entry.
+        assert GE.from_bytes_compressed(bytearray(encodings[0])) is P0
+        assert GE.from_bytes_compressed(memoryview(encodings[0])) is P0
+        # xonly keys are cached as the point with even y.
+        P1 = GE.from_bytes_xonly(encodings[1][1:])
+        assert GE.from_bytes_compressed(b"\x02" + encodings[1][1:]) is P1
+        assert P1.to_bytes_compressed() == b"\x02" + encodings[1][1:]
+        # Decoding a third point evicts the least recently used one (P0).
+        GE.from_bytes_compressed(encodings[2])
+        assert len(cache) == 2
+        assert GE.from_bytes_compressed(encodings[0]) is not P0
+        # Encoding uncached points does not insert them.
+        points[2].to_bytes_compressed()
+        assert len(cache) == 2 and cache.stats()["size"] == 2
+        # Invalid encodings are rejected and not cached.
+        try:
+            GE.from_bytes_compressed(b"\x05" + encodings[0][1:])
+            assert False
+        except ValueError:
+            pass
+        # A full DKG works with the cache enabled.
+        test_correctness(2, 3, simulate_chilldkg)
+        assert cache.hits > 0
+    finally:
+        disable_decompression_cache()
+    assert decompression_cache() is None
+    assert GE.from_bytes_compressed(encodings[0]) == points[0]
+
+
+def test_batch_normalize():
+    # Sums of points have coordinates in fraction form.
+    points = [randint(1, GE.ORDER - 1) * G + G for _ in range(5)] + [GE()]
+    expected = [P.to_bytes_compressed_with_infinity() for P in points]
+    points = [GE.sum(P) for P in points]
+    GE.batch_normalize(points)
+    assert [P.to_bytes_compressed_with_infinity() for P in points] == expected
+
+    # The same point, or points sharing a coordinate (P and -P share x), may
+    # occur several times.
+    A = randint(1, GE.ORDER - 1) * G
+    B = randint(1, GE.ORDER - 1) * G
+    expected_P = (A + G).to_bytes_compressed()
+    expected_neg_P = (-(A + G)).to_bytes_compressed()
+    expected_Q = (B + G).to_bytes_compressed()
+    # Compute the points again, so that they are in fraction form.
+    P, Q = A + G, B + G
+    points = [Q, P, -P, P, Q]
+    GE.batch_normalize(points)
+    assert [R.to_bytes_compressed() for R in points] == [
+        expected_Q,
+        expected_P,
+        expected_neg_P,
+        expected_P,
+        expected_Q,
+    ]
+    assert P.x._den == 1 and P.y._den == 1
+
+
+def test_ecdh_multi():
+    seckey = random_bytes(32)
+    pubkeys = [pubkey_gen_plain(random_bytes(32)) for _ in range(3)]
+    contexts = [random_bytes(4) for _ in range(3)]
+    for sending in [False, True]:
+        assert encpedpop.ecdh_multi(seckey, pubkeys[0], pubkeys, contexts, sending) == [
+            encpedpop.ecdh(seckey, pubkeys[0], pubkey, context, sending)
+            for pubkey, context in zip(pubkeys, contexts)
+        ]
+
+
+def test_schnorr_batch_verify():
+    n = 4
+    seckeys = [random_bytes(32) for _ in range(n)]
+    pubkeys = [pubkey_gen(seckey) for seckey in seckeys]
+    msgs = [random_bytes(randint(0, 100)) for _ in range(n)]
+    sigs = [
+        schnorr_sign(msg, seckey, random_bytes(32), tag_prefix="test")
+        for msg, seckey in zip(msgs, seckeys)
+    ]
+    assert schnorr_batch_verify(msgs, pubkeys, sigs, tag_prefix="test")
+    assert schnorr_batch_find_invalid(msgs, pubkeys, sigs, tag_prefix="test") is None
+    assert not schnorr_batch_verify(msgs, pubkeys, sigs)
+
+    # Messages given as chunks
+    chunked_msgs = [[msg[:5], memoryview(msg)[5:50], msg[50:]] for msg in msgs]
+    assert schnorr_batch_verify(chunked_msgs, pubkeys, sigs, tag_prefix="test")
+    for msg, chunked_msg, seckey, pubkey in zip(msgs, chunked_msgs, seckeys, pubkeys):
+        sig = schnorr_sign(chunked_msg, seckey, random_bytes(32), tag_prefix="test")
+        assert schnorr_verify(msg, pubkey, sig, tag_prefix="test")
+        assert schnorr_verify(chunked_msg, pubkey, sig, tag_prefix="test")
+        # Other bytes-like objects are a single chunk.
+        assert schnorr_verify(bytearray(msg), pubkey, sig, tag_prefix="test")
+        assert schnorr_verify(memoryview(msg), pubkey, sig, tag_prefix="test")
+
+    # Signing with a precomputed key pair
+    for msg, seckey, pubkey in zip(msgs, seckeys, pubkeys):
+        d, P = schnorr_keypair(seckey)
+        assert P.to_bytes_xonly() == pubkey and P.has_even_y()
+        sig = schnorr_sign_keypair(msg, d, P, random_bytes(32), tag_prefix="test")
+        assert schnorr_verify(msg, pubkey, sig, tag_prefix="test")
+        # The signature is verified, so inconsistent key pairs are rejected.
+        rejected = False
+        try:
+            schnorr_sign_keypair(msg, d + 1, P, random_bytes(32), tag_prefix="test")
+        except AssertionError:
+            rejected = True
+        assert rejected
+
+    # Public keys given as group elements (with any y coordinate)
+    pubkeys_ge = [Scalar.from_bytes(seckey) * G for seckey in seckeys]
+    for msg, pubkey_ge, sig in zip(msgs, pubkeys_ge, sigs):
+        assert schnorr_verify_ge(msg, pubkey_ge, sig, tag_prefix="test")
+        assert schnorr_verify_ge(msg, -pubkey_ge, sig, tag_prefix="test")
+        assert not schnorr_verify_ge(msg, pubkey_ge, sig)
+    assert schnorr_batch_verify(msgs, pubkeys_ge, sigs, tag_prefix="test")
+
+    invalid = sorted([randint(0, n - 1), randint(0, n - 1)])
+    for i in invalid:
+        sigs[i] = sigs[i][:32] + bytes_from_int(randint(0, GE.ORDER - 1))
+    assert not schnorr_batch_verify(msgs, pubkeys, sigs, tag_prefix="test")
+    assert (
+        schnorr_batch_find_invalid(msgs, pubkeys, sigs, tag_prefix="test") == invalid[0]
+    )
+    assert (
+        schnorr_batch_find_invalid(msgs, pubkeys_ge, sigs, tag_prefix="test")
+        == invalid[0]
+    )
+    for msg, pubkey, pubkey_ge, sig in zip(msgs, pubkeys, pubkeys_ge, sigs):
+        assert schnorr_verify(msg, pubkey, sig, tag_prefix="test") == (
+            schnorr_verify_ge(msg, pubkey_ge, sig, tag_prefix="test")
+        )
+
+
 def test_vss_correctness():
     def rand_polynomial(t):
         return Polynomial([randint(1, GE.ORDER - 1) for _ in range(1, t + 1)])
 
-    for t in range(1, 3):
-        for n in range(t, 2 * t + 1):
+    for t in range(1, 5):
+        for n in range(t, 2 * t + 2):
             f = rand_polynomial(t)
             vss = VSS(f)
             secshares = vss.secshares(n)
@@ -80,6 +351,37 @@ def test_vss_correctness():
                 VSSCommitment.verify_secshare(secshares[i], vss.commit().pubshare(i))
                 for i in range(n)
             )
+            pubshares = vss.commit().pubshares(n)
+            assert pubshares == [secshare * G for secshare in secshares]
+            assert VSSCommitment.batch_verify_secshares(secshares, pubshares)
+            assert VSSCommitment.find_invalid_secshare(secshares, pubshares) is None
+
+            # The first invalid pair is found.
+            invalid = sorted(set(randint(0, n - 1) for _ in range(2)))
+            for i in invalid:
+                secshares[i] += 1
+            assert not VSSCommitment.batch_verify_secshares(secshares, pubshares)
+            assert (
+                VSSCommitment.find_invalid_secshare(secshares, pubshares) == invalid[0]
+            )
+
+
+def test_multipoint_eval():
+    threshold = vss.MULTIPOINT_EVAL_THRESHOLD
+    # Make sure that multipoint evaluation is used, also for small sizes.
+    vss.MULTIPOINT_EVAL_THRESHOLD = 1
+    try:
+        for t, n in [(1, 1), (2, 5), (140, 150), (300, 270)]:
+            f = Polynomial([Scalar(randint(0, GE.ORDER - 1)) for _ in range(t)])
+            xs = [randint(0, GE.ORDER - 1) for _ in range(n // 2)]
+            xs += list(range(1, n - len(xs) + 1))
+            expected = [
+                sum(int(c) * pow(x, j, GE.ORDER) for j, c in enumerate(f.coeffs))
+                for x in xs
+            ]
+            assert f.eval_many(xs) == [Scalar(e) for e in expected]
+    finally:
+        vss.MULTIPOINT_EVAL_THRESHOLD = threshold
 
 
 def simulate_simplpedpop(
@@ -115,7 +417,9 @@ def simulate_simplpedpop(
             inv_msgs = simplpedpop.coordinator_investigate(pmsgs)
             assert len(inv_msgs) == len(pmsgs)
             try:
-                simplpedpop.participant_investigate(e, inv_msgs[i], partial_secshares)
+                simplpedpop.participant_investigate(
+                    e, inv_msgs[i], partial_secshares, batch=(i % 2 == 0)
+                )
             # If we're not faulty, we should blame the faulty party.
             except FaultyParticipantOrCoordinatorError as e:
                 assert i != faulty_idx
@@ -127,6 +431,43 @@ def simulate_simplpedpop(
     return pre_finalize_rets
 
 
+def test_pubshares_hint():
+    t, n = 3, 5
+    prets = [simplpedpop.participant_step1(random_bytes(32), t, n, i) for i in range(n)]
+    pmsgs = [pmsg for (_, pmsg, _) in prets]
+    cmsg, cout, ceq = simplpedpop.coordinator_step(pmsgs, t, n)
+    assert cmsg.pubshares is None
+    cmsg_hint, cout_hint, ceq_hint = simplpedpop.coordinator_step(
+        pmsgs, t, n, pubshares_hint=True
+    )
+    assert cmsg_hint.pubshares is not None
+    assert (cout_hint, ceq_hint) == (cout, ceq)
+    assert cmsg_hint.to_bytes() == cmsg.to_bytes()
+
+    for i in range(n):
+        pstate = prets[i][0]
+        secshare = simplpedpop.participant_step2_prepare_secshare(
+            [partial_secshares_for[i] for (_, _, partial_secshares_for) in prets]
+        )
+        ret = simplpedpop.participant_step2(pstate, cmsg, secshare)
+        assert simplpedpop.participant_step2(pstate, cmsg_hint, secshare) == ret
+        assert ret[0].pubshares == cout.pubshares
+
+    # An invalid hint is detected.
+    invalid_hints = [
+        cmsg_hint.pubshares[:-1],
+        cmsg_hint.pubshares[:-1] + [cmsg_hint.pubshares[-1] + G],
+    ]
+    for invalid_hint in invalid_hints:
+        try:
+            simplpedpop.participant_step2(
+                pstate, cmsg_hint._replace(pubshares=invalid_hint), secshare
+            )
+            assert False
+        except FaultyCoordinatorError:
+            pass
+
+
 def encpedpop_keys(seed: bytes) -> Tuple[bytes, bytes]:
     deckey = tagged_hash_bip_dkg("encpedpop deckey", seed)
     enckey = pubkey_gen_plain(deckey)
@@ -173,7 +514,8 @@ def simulate_encpedpop(
             inv_msgs = encpedpop.coordinator_investigate(pmsgs)
             assert len(inv_msgs) == len(pmsgs)
             try:
-                encpedpop.participant_investigate(e, inv_msgs[i])
+                # The batch blame search must blame the same party.
+                encpedpop.participant_investigate(e, inv_msgs[i], batch=True)
             # If we're not faulty, we should blame the faulty party.
             except FaultyParticipantOrCoordinatorError as e:
                 assert i != faulty_idx[i]
@@ -195,11 +537,21 @@ def simulate_chilldkg(
         hostpubkeys += [chilldkg.hostpubkey_gen(hostseckeys[i])]
 
     params = chilldkg.SessionParams(hostpubkeys, t)
+    prepared = chilldkg.params_prepare(params)
+    assert chilldkg.params_id(prepared) == chilldkg.params_id(params)
+
+    # Let some participants use prepared host keys.
+    hostkeys = [
+        chilldkg.hostkey_prepare(hostseckey) if i % 3 == 0 else hostseckey
+        for i, hostseckey in enumerate(hostseckeys)
+    ]
 
     prets1 = []
     for i in range(n):
         random = random_bytes(32)
-        prets1 += [chilldkg.participant_step1(hostseckeys[i], params, random)]
+        # Let some participants use the prepared session parameters.
+        params_i = prepared if i % 2 == 0 else params
+        prets1 += [chilldkg.participant_step1(hostkeys[i], params_i, random)]
 
     pstates1 = [pret[0] for pret in prets1]
     pmsgs = [pret[1] for pret in prets1]
@@ -210,17 +562,49 @@ def simulate_chilldkg(
             faulty_idx[i:] = [randint(0, n - 1)]
             pmsgs[faulty_idx[i]].enc_pmsg.enc_shares[i] += Scalar(17)
 
-    cstate, cmsg1 = chilldkg.coordinator_step1(pmsgs, params)
+    # Let the coordinator send a pubshares hint (which does not affect outputs).
+    cstate, cmsg1 = chilldkg.coordinator_step1(pmsgs, params, pubshares_hint=True)
+
+    # Aggregating the messages in the order of arrival gives the same result.
+    # If we investigate, let the accumulator spill the messages to disk.
+    acc = chilldkg.coordinator_step1_begin(prepared, spill=investigation)
+    for i in sample(range(n), n):
+        chilldkg.coordinator_step1_add(acc, i, pmsgs[i])
+        if investigation:
+            # Reading back from the store works while messages are still added.
+            store = acc.enc_acc.store
+            assert store is not None
+            stored, enc_pmsg = store[i], pmsgs[i].enc_pmsg
+            assert (
+                stored.simpl_pmsg.com.to_bytes() == enc_pmsg.simpl_pmsg.com.to_bytes()
+            )
+            assert stored._replace(simpl_pmsg=enc_pmsg.simpl_pmsg) == enc_pmsg
+    try:
+        chilldkg.coordinator_step1_add(acc, 0, pmsgs[0])
+        assert False
+    except ValueError:
+        pass
+    assert chilldkg.coordinator_step1_finish(acc, pubshares_hint=True) == (
+        cstate,
+        cmsg1,
+    )
+    if not investigation:
+        acc.close()
 
     prets2 = []
     for i in range(n):
         try:
-            prets2 += [chilldkg.participant_step2(hostseckeys[i], pstates1[i], cmsg1)]
+            prets2 += [chilldkg.participant_step2(hostkeys[i], pstates1[i], cmsg1)]
         except UnknownFaultyParticipantOrCoordinatorError as e:
             if not investigation:
                 raise
             inv_msgs = chilldkg.coordinator_investigate(pmsgs)
             assert len(inv_msgs) == len(pmsgs)
+            assert chilldkg.coordinator_investigate(acc) == inv_msgs
+            cinv = chilldkg.coordinator_investigate_participant(pmsgs, i)
+            assert cinv == inv_msgs[i]
+            cinv = chilldkg.coordinator_investigate_participant(acc, i)
+            assert cinv == inv_msgs[i]
             try:
                 chilldkg.participant_investigate(e, inv_msgs[i])
             # If we're not faulty, we should blame the faulty party.
@@ -230,6 +614,7 @@ def simulate_chilldkg(
             # If we're faulty, we'll blame the coordinator.
             except FaultyCoordinatorError:
                 assert i == faulty_idx[i]
+            acc.close()
             return None
 
     cmsg2, cout, crec = chilldkg.coordinator_finalize(
@@ -315,6 +700,32 @@ def test_correctness_dkg_output(t, n, dkg_outputs: List[simplpedpop.DKGOutput]):
     ]
     for i in range(1, n + 1):
         assert secshares_scalar[i] * G == GE.from_bytes_compressed(pubshares[0][i - 1])
+    assert VSSCommitment.verify_secshares(
+        [
+            (
+                Scalar.from_bytes(secshares[i]),
+                GE.from_bytes_compressed(pubshares[0][i - 1]),
+            )
+            for i in range(1, n + 1)
+        ]
+    )
+
+    # Check the consistency of every DKG output
+    chilldkg_outputs = [chilldkg.DKGOutput._make(out) for out in dkg_outputs]
+    for chilldkg_output in chilldkg_outputs:
+        assert chilldkg.verify_dkg_output(chilldkg_output, t)
+    chilldkg_output = chilldkg_outputs[1]
+    if t > 1:
+        assert not chilldkg.verify_dkg_output(chilldkg_output, t - 1)
+    wrong_secshare = (Scalar.from_bytes(secshares[1]) + 1).to_bytes()
+    assert not chilldkg.verify_dkg_output(
+        chilldkg_output._replace(secshare=wrong_secshare), t
+    )
+    wrong_pubshare = GE.from_bytes_compressed(pubshares[0][n - 1]) + G
+    wrong_pubshares = pubshares[0][: n - 1] + [wrong_pubshare.to_bytes_compressed()]
+    assert not chilldkg.verify_dkg_output(
+        chilldkg_output._replace(pubshares=wrong_pubshares), t
+    )
 
     # Check that all combinations of t participants can recover the threshold pubkey
     for tsubset in combinations(range(1, n + 1), t):
@@ -345,14 +756,34 @@ def test_correctness(t, n, simulate_dkg, recovery=False, investigation=False):
         rec = eqs_or_recs[0]
         # Check correctness of chilldkg.recover
         for i in range(n + 1):
-            (secshare, threshold_pubkey, pubshares), _ = chilldkg.recover(seeds[i], rec)
+            dkg_output, params = chilldkg.recover(seeds[i], rec)
+            assert chilldkg.verify_dkg_output(dkg_output, params.t)
+            secshare, threshold_pubkey, pubshares = dkg_output
             assert secshare == dkg_outputs[i][0]
             assert threshold_pubkey == dkg_outputs[i][1]
             assert pubshares == dkg_outputs[i][2]
-
-
+            if seeds[i] is not None:
+                hostkey = chilldkg.hostkey_prepare(seeds[i])
+                assert chilldkg.recover(hostkey, rec)[0] == dkg_outputs[i]
+                # The secret key does not appear in the string representation.
+                for text in [repr(hostkey), str(hostkey)]:
+                    assert seeds[i].hex() not in text and repr(seeds[i]) not in text
+                    assert str(hostkey.signing_seckey) not in text
+
+
+test_split_lambda()
+test_batch_mul()
+test_fast_ge_mul_serialization()
+test_tagged_hash()
+test_compact_representations()
+test_decompression_cache()
+test_batch_normalize()
+test_ecdh_multi()
+test_schnorr_batch_verify()
+test_pubshares_hint()
 test_chilldkg_params_validate()
 test_vss_correctness()
+test_multipoint_eval()
 test_recover_secret()
 for t, n in [(1, 1), (1, 2), (2, 2), (2, 3), (2, 5)]:
     test_correctness(t, n, simulate_simplpedpop)